@@ -1,4 +1,7 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class SewoappConfig(AppConfig):
@@ -6,4 +9,14 @@ class SewoappConfig(AppConfig):
     name = 'sewoapp'
     
     def ready(self):
-        import sewoapp.signals
\ No newline at end of file
+        import sewoapp.signals
+        from django.conf import settings
+        from sewoapp import instrumentation, metrics
+        from sewoapp.postgres import install_postgres_objects
+
+        post_migrate.connect(install_postgres_objects, sender=self)
+        connection_created.connect(metrics.record_connection_created)
+        request_finished.connect(metrics.record_request_finished)
+        if settings.INSTRUMENTATION_ENABLED:
+            connection_created.connect(instrumentation.install)
+            instrumentation.install()
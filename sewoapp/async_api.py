@@ -0,0 +1,208 @@
+"""
+Building blocks for the async chat views in ``views.py``.
+
+DRF views are synchronous, so the async views are plain Django views that
+reproduce the parts of DRF they rely on: authentication with the
+configured DRF authentication classes (sessions are resolved with the
+async ORM, other authenticators run in a worker thread), JSON
+request/response handling with DRF-style ``{"detail": ...}`` errors, and
+keyset pagination compatible in shape with ``TimestampCursorPagination``.
+"""
+import base64
+import binascii
+from datetime import datetime
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .renderers import json_dumps, json_loads
+
+
+class APIError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def json_response(data, status=200):
+    return HttpResponse(json_dumps(data), status=status, content_type='application/json')
+
+
+class CSRFCheck(CsrfViewMiddleware):
+    def _reject(self, request, reason):
+        # Kembalikan alasan (bukan HttpResponseForbidden), seperti rest_framework CSRFCheck
+        return reason
+
+
+def _enforce_csrf(request):
+    check = CSRFCheck(lambda request: None)
+    check.process_request(request)
+    reason = check.process_view(request, None, (), {})
+    if reason:
+        raise APIError(f'CSRF Failed: {reason}', status=403)
+
+
+async def aauthenticate(request):
+    """
+    Return the authenticated user of ``request`` or None.
+    """
+    # Dipasang oleh APIClient.force_authenticate (tests)
+    forced = getattr(request, '_force_auth_user', None)
+    if forced is not None:
+        return forced
+
+    others = []
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, SessionAuthentication):
+            user = await request.auser()
+            if user.is_authenticated and user.is_active:
+                if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+                    _enforce_csrf(request)
+                return user
+        else:
+            others.append(authentication_class())
+
+    if not others:
+        return None
+
+    def authenticate():
+        drf_request = Request(request, authenticators=others)
+        try:
+            return drf_request.user if drf_request.user.is_authenticated else None
+        except exceptions.APIException as exc:
+            return exc
+
+    result = await sync_to_async(authenticate)()
+    if isinstance(result, exceptions.APIException):
+        raise authentication_error(request, result.detail)
+    return result
+
+
+def authentication_error(request, detail):
+    """
+    401 when the first authentication class sends a ``WWW-Authenticate``
+    challenge, otherwise 403, as DRF does.
+    """
+    classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    challenge = classes[0]().authenticate_header(Request(request)) if classes else None
+    return APIError(detail, status=401 if challenge else 403)
+
+
+def parse_body(request):
+    if request.content_type == 'application/json':
+        try:
+            return json_loads(request.body or b'{}')
+        except ValueError as exc:
+            raise APIError(f'JSON parse error - {exc}')
+    return request.POST
+
+
+class AsyncAPIView(View):
+    """
+    Async view requiring an authenticated user (``request.user``), with
+    ``APIError`` turned into a JSON error response. Like DRF views it is
+    CSRF-exempt except for session-authenticated requests.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise authentication_error(request, "Authentication credentials were not provided.")
+            request.user = user
+            return await super().dispatch(request, *args, **kwargs)
+        except APIError as exc:
+            return json_response({'detail': exc.detail}, status=exc.status)
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        raise APIError(f'Method "{request.method}" not allowed.', status=405)
+
+
+class KeysetPaginator:
+    """
+    Ascending keyset pagination over ``(timestamp_field, 'id')`` with opaque
+    ``next``/``previous`` cursors.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self, request, timestamp_field='timestamp'):
+        self.request = request
+        self.field = timestamp_field
+        self.page_size = self._page_size()
+        self.position, self.reverse = self._decode(request.GET.get('cursor'))
+
+    def _page_size(self):
+        try:
+            size = int(self.request.GET.get(self.page_size_query_param, ''))
+        except ValueError:
+            return settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+        return max(1, min(size, self.max_page_size))
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            direction, timestamp, pk = raw.split('|')
+            return (datetime.fromisoformat(timestamp), int(pk)), direction == 'p'
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise APIError('Invalid cursor', status=404)
+
+    def _encode(self, obj, direction):
+        raw = f'{direction}|{getattr(obj, self.field).isoformat()}|{obj.pk}'
+        params = self.request.GET.copy()
+        params['cursor'] = base64.urlsafe_b64encode(raw.encode()).decode()
+        return self.request.build_absolute_uri(f'{self.request.path}?{urlencode(params, doseq=True)}')
+
+    def page_queryset(self, queryset):
+        """
+        The rows of the requested page plus one, to detect a further page.
+        """
+        field = self.field
+        if self.position is not None:
+            timestamp, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+            else:
+                queryset = queryset.filter(Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk}))
+        ordering = (f'-{field}', '-id') if self.reverse else (field, 'id')
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    async def paginate(self, queryset):
+        """
+        Return ``(items, next_url, previous_url)`` using one query.
+        """
+        items = [obj async for obj in self.page_queryset(queryset)]
+
+        has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if self.reverse:
+            items.reverse()
+
+        next_url = previous_url = None
+        if items:
+            if self.reverse:
+                # Mundur dari sebuah posisi: selalu ada halaman berikutnya
+                next_url = self._encode(items[-1], 'n')
+                previous_url = self._encode(items[0], 'p') if has_more else None
+            else:
+                next_url = self._encode(items[-1], 'n') if has_more else None
+                previous_url = self._encode(items[0], 'p') if self.position is not None else None
+        return items, next_url, previous_url
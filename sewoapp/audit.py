@@ -0,0 +1,83 @@
+"""
+Booking audit log (``BookingLog``) writing.
+
+Single saves are logged by the ``post_save`` handler in ``signals.py``.
+Bulk status changes go through ``transition_bookings``, which updates the
+rows with one set-based UPDATE and writes their logs with ``bulk_create``
+through ``BookingLogWriter``, without per-row signals.
+"""
+from django.db import transaction
+
+from . import notifications
+from .models import Booking, BookingLog
+
+
+def build_log(booking_id, previous_status, new_status, changed_by_id=None, description=None):
+    if description is None:
+        if previous_status is None:
+            description = "Booking created"
+        else:
+            description = f"Status changed from {previous_status} to {new_status}"
+    return BookingLog(
+        booking_id=booking_id,
+        previous_status=previous_status,
+        new_status=new_status,
+        description=description,
+        changed_by_id=changed_by_id,
+    )
+
+
+class BookingLogWriter:
+    """
+    Collect log entries and insert them in batches. Use as a context
+    manager; pending entries are flushed on a clean exit.
+    """
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._pending = []
+
+    def add(self, *args, **kwargs):
+        self._pending.append(build_log(*args, **kwargs))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        batch, self._pending = self._pending, []
+        if batch:
+            BookingLog.objects.bulk_create(batch)
+        return batch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+
+def transition_bookings(queryset, new_status, changed_by=None, description=None, batch_size=500):
+    """
+    Move every booking in ``queryset`` to ``new_status`` and log each
+    transition. Returns the list of ``(booking_id, previous_status)`` changed.
+    """
+    changed_by_id = changed_by.pk if changed_by is not None else None
+    with transaction.atomic():
+        rows = list(
+            queryset.exclude(status=new_status)
+            .select_for_update(of=('self',))
+            .order_by('pk')
+            .values_list('pk', 'status', 'customer_id', 'vehicle__owner_id')
+        )
+        with BookingLogWriter(batch_size) as writer:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                Booking.objects.filter(pk__in=[row[0] for row in chunk]).update(status=new_status)
+                for pk, previous_status, _, _ in chunk:
+                    writer.add(pk, previous_status, new_status, changed_by_id, description)
+
+        notifications.notify_many([
+            notifications.booking_status_event(pk, previous_status, new_status, (customer_id, owner_id))
+            for pk, previous_status, customer_id, owner_id in rows
+        ])
+    return [(pk, previous_status) for pk, previous_status, _, _ in rows]
@@ -0,0 +1,69 @@
+"""
+Vehicle availability by date range.
+
+A vehicle is unavailable for ``[start, end)`` when one of its active
+bookings overlaps that range. On PostgreSQL the overlap test is written as
+``booking_period(start_date, end_date) && tstzrange(start, end)`` so it can
+use the GiST index behind the ``booking_no_overlap`` exclusion constraint
+(see ``postgres.py``), which is built on the same expression; other
+databases use the equivalent comparison on ``start_date``/``end_date``,
+backed by the composite index on ``Booking``.
+
+``tstzrange`` raises an error when the lower bound is after the upper one,
+and older rows may have ``start_date > end_date``. The period therefore
+ends at ``GREATEST(start_date, end_date)``: such a row gets an empty range,
+which overlaps nothing, exactly as with the comparison on other databases.
+"""
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Exists, F, Func, OuterRef, Value
+from django.db.models.functions import Greatest
+
+from .models import Booking, Vehicle
+
+
+class TsTzRange(Func):
+    function = 'tstzrange'
+    output_field = DateTimeRangeField()
+
+
+def overlapping_bookings(start, end, queryset=None):
+    """
+    Active bookings overlapping the half-open range ``[start, end)``.
+    """
+    if queryset is None:
+        queryset = Booking.objects.all()
+    queryset = queryset.filter(status__in=Booking.ACTIVE_STATUSES)
+
+    if connection.vendor == 'postgresql':
+        return queryset.alias(
+            period=TsTzRange(F('start_date'), Greatest(F('start_date'), F('end_date')), Value('[)'))
+        ).filter(period__overlap=DateTimeTZRange(start, end, '[)'))
+    return queryset.filter(start_date__lt=end, end_date__gt=start)
+
+
+def available_vehicles(start, end, queryset=None):
+    if queryset is None:
+        queryset = Vehicle.objects.all()
+    busy = overlapping_bookings(start, end).filter(vehicle=OuterRef('pk'))
+    return queryset.filter(is_available=True).exclude(Exists(busy))
+
+
+def filter_vehicles(queryset, params):
+    """
+    Apply the validated parameters of ``VehicleSearchSerializer``.
+    """
+    if params.get('type'):
+        queryset = queryset.filter(type=params['type'])
+    if params.get('fuel_type'):
+        queryset = queryset.filter(fuel_type=params['fuel_type'])
+    if params.get('location'):
+        queryset = queryset.filter(location__icontains=params['location'])
+    if params.get('min_price') is not None:
+        queryset = queryset.filter(daily_price__gte=params['min_price'])
+    if params.get('max_price') is not None:
+        queryset = queryset.filter(daily_price__lte=params['max_price'])
+    if params.get('start_date'):
+        queryset = available_vehicles(params['start_date'], params['end_date'], queryset)
+    return queryset
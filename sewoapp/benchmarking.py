@@ -0,0 +1,91 @@
+"""
+Small helpers shared by the ``bench_*`` management commands.
+"""
+import math
+import time
+
+# Channel layer for websocket benchmarks: no Redis needed, one process
+IN_MEMORY_LAYER = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'CONFIG': {'capacity': 100000},
+    },
+}
+
+
+def with_user(application, user):
+    # Stand-in for AuthMiddlewareStack: every connection is authenticated as `user`
+    async def app(scope, receive, send):
+        return await application(dict(scope, user=user), receive, send)
+    return app
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(samples, elapsed=None):
+    """
+    Summarize a list of per-operation durations (in seconds).
+    ``elapsed`` is the wall time of the whole run, used for throughput.
+    """
+    if elapsed is None:
+        elapsed = sum(samples)
+    count = len(samples)
+    return {
+        'count': count,
+        'elapsed': elapsed,
+        'throughput': count / elapsed if elapsed else 0.0,
+        'mean_ms': (sum(samples) / count * 1000) if count else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def format_summary(name, summary):
+    return (
+        f"{name:<32} n={summary['count']:<6} "
+        f"{summary['throughput']:>9.1f} ops/s  "
+        f"mean={summary['mean_ms']:.2f}ms  p50={summary['p50_ms']:.2f}ms  "
+        f"p95={summary['p95_ms']:.2f}ms  p99={summary['p99_ms']:.2f}ms"
+    )
+
+
+def run_timed(fn, iterations):
+    """
+    Call ``fn(i)`` ``iterations`` times and return (samples, elapsed).
+    """
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+    return samples, time.perf_counter() - started
+
+
+def compare(baseline, current):
+    """
+    Compare two ``{name: summary}`` mappings. Returns a list of
+    ``(name, metric, before, after, change_pct)`` for the scenarios present
+    in both; for latencies a positive change is a slowdown.
+    """
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        for metric in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms'):
+            before, after = baseline[name][metric], current[name][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            rows.append((name, metric, before, after, change))
+    return rows
+
+
+def format_comparison(rows):
+    return [
+        f"{name:<32} {metric:<10} {before:>10.2f} -> {after:>10.2f}  {change:+7.1f}%"
+        for name, metric, before, after, change in rows
+    ]
@@ -0,0 +1,129 @@
+"""
+Response cache for read-mostly endpoints (the vehicle catalog).
+
+Cached entries hold the serialized ``response.data`` under a key built from
+the endpoint, the request's host and query parameters, and a version
+number. Versions are millisecond timestamps kept in the cache: one for the
+whole catalog (used by list pages) and one per object (used by detail
+views). Writes bump the affected versions after commit, which orphans the
+old entries instead of deleting them; they expire after the view's
+``cache_timeout``.
+
+Because a version only changes when the data does, it doubles as the ETag
+source, so conditional requests are answered with ``304 Not Modified``
+without reading the cached body. There is no ``Last-Modified``: HTTP dates
+have one-second precision, so ``If-Modified-Since`` could not tell apart two
+changes made within the same second.
+
+Versions are only meaningful when every worker reads them from the same
+cache, so the mixin is active only with ``RESPONSE_CACHE_ENABLED``, which
+requires a shared ``CACHE_URL`` (see settings.py). Without it responses are
+rendered on every request.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from . import metrics
+
+KEY_PREFIX = 'response-cache:'
+
+
+def _version_key(namespace, pk=None):
+    return f'{KEY_PREFIX}{namespace}:version' + (f':{pk}' if pk is not None else '')
+
+
+def get_version(namespace, pk=None):
+    key = _version_key(namespace, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace, pk=None):
+    key = _version_key(namespace, pk)
+    version = max(time.time_ns() // 1_000_000, (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+
+
+def invalidate(namespace, *pks):
+    """
+    Invalidate the list pages of ``namespace`` and the detail entries of
+    ``pks`` once the current transaction commits.
+    """
+    def bump():
+        bump_version(namespace)
+        for pk in pks:
+            if pk is not None:
+                bump_version(namespace, pk)
+
+    transaction.on_commit(bump)
+
+
+class CachedResponseMixin:
+    """
+    Cache ``list`` and ``retrieve`` responses of a viewset. Set
+    ``cache_namespace`` and call ``caching.invalidate(namespace, pk)`` when
+    the underlying data changes.
+    """
+    cache_namespace = None
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        render = functools.partial(super().list, request, *args, **kwargs)
+        return self.cached_response(request, None, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        object_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        render = functools.partial(super().retrieve, request, *args, **kwargs)
+        return self.cached_response(request, object_id, render)
+
+    def get_cache_key(self, request, object_id, version):
+        params = '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.lists()))
+        digest = hashlib.sha1(f'{request.get_host()}?{params}'.encode()).hexdigest()
+        return f'{KEY_PREFIX}{self.cache_namespace}:{self.action}:{object_id or ""}:{version}:{digest}'
+
+    def cached_response(self, request, object_id, render):
+        """
+        Serve the response of ``render()`` from the cache, or a 304 when the
+        client's ETag is still current.
+        """
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return render()
+
+        version = get_version(self.cache_namespace, object_id)
+        key = self.get_cache_key(request, object_id, version)
+        etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            metrics.incr(f'{self.cache_namespace}_cache.not_modified')
+            return self._add_validators(not_modified, etag)
+
+        data = cache.get(key)
+        if data is not None:
+            metrics.incr(f'{self.cache_namespace}_cache.hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+        else:
+            metrics.incr(f'{self.cache_namespace}_cache.miss')
+            response = render()
+            if response.status_code == 200:
+                cache.set(key, response.data, self.cache_timeout)
+            response['X-Cache'] = 'MISS'
+        return self._add_validators(response, etag)
+
+    def _add_validators(self, response, etag):
+        response['ETag'] = etag
+        # Klien wajib revalidasi, supaya perubahan langsung terlihat
+        patch_cache_control(response, no_cache=True)
+        return response
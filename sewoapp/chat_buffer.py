@@ -0,0 +1,165 @@
+"""
+Write-behind buffering for chat messages (``CHAT_WRITE_BEHIND = True``).
+
+``ChatConsumer`` broadcasts each message right away and hands it to the
+process-wide ``message_buffer``, which persists messages with a single
+``bulk_create`` once ``CHAT_BUFFER_MAX_SIZE`` messages are pending or
+``CHAT_BUFFER_FLUSH_INTERVAL`` seconds have passed. The buffer is also
+flushed when a consumer disconnects and, synchronously, at interpreter exit.
+
+When the batch insert fails the messages are saved one by one, so a single
+bad row (say, for a conversation deleted in the meantime) does not hold up
+the others. Messages that still fail are put back and retried on the next
+flush, and dropped with an error log after ``CHAT_BUFFER_MAX_RETRIES``
+failed flushes.
+"""
+import asyncio
+import atexit
+import logging
+from collections import Counter
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from . import unread
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+def persist_messages(batch):
+    with transaction.atomic():
+        Message.objects.bulk_create(batch)
+        per_sender = Counter((message.conversation_id, message.sender_id) for message in batch)
+        latest = {(message.conversation_id, message.sender_id): message.content for message in batch}
+        for (conversation_id, sender_id), count in per_sender.items():
+            unread.record_messages(conversation_id, sender_id, count, preview=latest[conversation_id, sender_id])
+
+
+def persist_with_fallback(batch):
+    """
+    Persist ``batch``, falling back to one message at a time when the batch
+    insert fails. Returns the messages that could not be saved.
+    """
+    try:
+        persist_messages(batch)
+        return []
+    except Exception:
+        if len(batch) == 1:
+            logger.warning("Failed to persist a buffered chat message", exc_info=True)
+            return batch
+        logger.warning(
+            "Failed to persist %d buffered chat message(s) at once, retrying one by one",
+            len(batch), exc_info=True,
+        )
+
+    failed = []
+    for message in batch:
+        # bulk_create yang di-rollback bisa sudah mengisi pk
+        message.pk = None
+        message._state.adding = True
+        try:
+            persist_messages([message])
+        except Exception:
+            logger.warning("Failed to persist a buffered chat message", exc_info=True)
+            failed.append(message)
+    return failed
+
+
+class MessageBuffer:
+    def __init__(self, max_size=None, flush_interval=None, max_retries=None):
+        self._max_size = max_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._pending = []
+        self._timer = None
+        self._flush_task = None
+
+    @property
+    def max_size(self):
+        return self._max_size or settings.CHAT_BUFFER_MAX_SIZE
+
+    @property
+    def flush_interval(self):
+        return self._flush_interval or settings.CHAT_BUFFER_FLUSH_INTERVAL
+
+    @property
+    def max_retries(self):
+        return self._max_retries or settings.CHAT_BUFFER_MAX_RETRIES
+
+    def __len__(self):
+        return len(self._pending)
+
+    async def add(self, conversation_id, sender_id, content, client_id=None):
+        self._pending.append(Message(
+            conversation_id=conversation_id,
+            sender_id=sender_id,
+            content=content,
+            client_id=client_id,
+        ))
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+        else:
+            self._schedule()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        # Event loop hanya menyimpan weak reference ke task: simpan di sini
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _take_batch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def flush(self):
+        batch = self._take_batch()
+        if not batch:
+            return
+        try:
+            failed = await database_sync_to_async(persist_with_fallback)(batch)
+        except Exception:
+            logger.exception("Failed to persist %d buffered chat message(s)", len(batch))
+            failed = batch
+        if failed:
+            self._requeue(failed)
+
+    def _requeue(self, failed):
+        retry = []
+        for message in failed:
+            message._flush_attempts = getattr(message, '_flush_attempts', 0) + 1
+            if message._flush_attempts >= self.max_retries:
+                logger.error(
+                    "Dropping chat message of sender %s in conversation %s after %d failed flushes",
+                    message.sender_id, message.conversation_id, message._flush_attempts,
+                )
+            else:
+                retry.append(message)
+        if retry:
+            self._pending[:0] = retry
+            self._schedule()
+
+    def flush_sync(self):
+        batch = self._take_batch()
+        if batch:
+            failed = persist_with_fallback(batch)
+            if failed:
+                logger.error("Dropping %d chat message(s) that could not be persisted", len(failed))
+
+
+message_buffer = MessageBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        message_buffer.flush_sync()
+    except Exception:
+        logger.exception("Failed to persist buffered chat messages on shutdown")
@@ -1,12 +1,54 @@
+import asyncio
+import time
+import uuid
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-import json
-from .models import Message, Conversation
+from django.conf import settings
+from django.db import transaction
+from . import message_sync, notifications, presence, unread
+from .instrumentation import measure
+from .chat_buffer import message_buffer
+from .models import Message
+from .participants import aget_participants, is_participant
+from .renderers import json_dumps, json_loads
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Chat of one conversation.
+
+    Client frames are JSON objects with a ``type``: ``message`` (the
+    default, for frames that only carry ``message``), ``typing``, ``read``,
+    ``ping`` (presence heartbeat) and ``sync``, sent after a reconnect with
+    the last message id the client has seen to receive only the messages it
+    missed. Typing, presence and read-receipt events only pass through the
+    channel layer and the cache; read receipts are debounced into a single
+    UPDATE.
+
+    A ``message`` frame may carry a ``client_id`` (a UUID), otherwise one is
+    assigned. It is broadcast with the message and returned by sync, so
+    clients can match live frames, which have no ``id`` yet with
+    ``CHAT_WRITE_BEHIND``, to synced messages.
+    """
+
+    FRAME_TYPES = ('message', 'typing', 'read', 'ping', 'sync')
+
     async def connect(self):
-        self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        async with measure('WS chat.connect'):
+            await self.join()
+
+    async def join(self):
+        self.conversation_id = int(self.scope['url_route']['kwargs']['conversation_id'])
         self.room_group_name = f'chat_{self.conversation_id}'
+        self.joined = False
+
+        # Otorisasi sekali per koneksi, bukan per pesan
+        self.user = self.scope.get('user')
+        self.participants = await aget_participants(self.conversation_id)
+        if self.user is None or not is_participant(self.participants, self.user):
+            await self.close()
+            return
 
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -14,6 +56,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
+        self.joined = True
+        self.last_typing_sent = None
+        self.read_up_to = None
+        self.read_all = False
+        self.read_task = None
+
+        if not settings.CHAT_PRESENCE_ENABLED:
+            return
+        if await presence.connect(self.conversation_id, self.user.pk):
+            await self.broadcast_presence(True)
+        # Status partisipan lain saat ini, agar client tidak perlu polling
+        others = [user_id for user_id in self.participants if user_id != self.user.pk]
+        online = await presence.online_users(self.conversation_id, others)
+        for user_id in others:
+            await self.send(text_data=json_dumps({
+                'type': 'presence', 'user_id': user_id, 'online': user_id in online,
+            }))
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(
@@ -21,30 +80,232 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
+        if self.joined:
+            if self.read_task is not None:
+                self.read_task.cancel()
+            await self.flush_read_receipt()
+            if self.last_typing_sent is not None:
+                await self.broadcast_typing(False)
+            if settings.CHAT_PRESENCE_ENABLED and await presence.disconnect(self.conversation_id, self.user.pk):
+                await self.broadcast_presence(False)
+
+        if settings.CHAT_WRITE_BEHIND:
+            # Jangan sampai pesan tertahan di buffer setelah client pergi
+            await message_buffer.flush()
+
     async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message = text_data_json['message']
-        sender_id = text_data_json['sender_id']
-
-        # Save message to database
-        conversation = await Conversation.objects.aget(id=self.conversation_id)
-        await Message.objects.acreate(
-            conversation=conversation,
-            sender_id=sender_id,
-            content=message
-        )
+        # Frame tidak valid dijawab dengan frame error, koneksi tetap terbuka
+        try:
+            text_data_json = json_loads(text_data)
+        except ValueError:
+            await self.send_error("Invalid JSON.")
+            return
+        if not isinstance(text_data_json, dict):
+            await self.send_error("Frame must be a JSON object.")
+            return
+        frame_type = text_data_json.get('type', 'message')
+
+        # Satu frame diukur seperti satu request (lihat instrumentation.py);
+        # tipe dari client dibatasi agar label metrik tidak tak terhingga
+        label = frame_type if frame_type in self.FRAME_TYPES else 'message'
+        async with measure(f'WS chat.{label}'):
+            await self.dispatch_frame(frame_type, text_data_json)
+
+    async def dispatch_frame(self, frame_type, text_data_json):
+        if frame_type == 'typing':
+            await self.receive_typing(bool(text_data_json.get('is_typing', True)))
+        elif frame_type == 'read':
+            message_id = text_data_json.get('message_id')
+            if message_id is not None:
+                try:
+                    message_id = int(message_id)
+                except (TypeError, ValueError):
+                    await self.send_error("message_id must be an integer.")
+                    return
+            self.queue_read_receipt(message_id)
+        elif frame_type == 'ping':
+            if settings.CHAT_PRESENCE_ENABLED:
+                await presence.heartbeat(self.conversation_id, self.user.pk)
+        elif frame_type == 'sync':
+            await self.receive_sync(text_data_json.get('after_id'), text_data_json.get('since'))
+        else:
+            message = text_data_json.get('message')
+            if not isinstance(message, str) or not message.strip():
+                await self.send_error("message must be a non-empty string.")
+                return
+            client_id = text_data_json.get('client_id')
+            try:
+                client_id = uuid.UUID(str(client_id)) if client_id is not None else uuid.uuid4()
+            except ValueError:
+                await self.send_error("client_id must be a UUID.")
+                return
+            await self.receive_message(message, client_id)
+
+    async def send_error(self, detail):
+        await self.send(text_data=json_dumps({'type': 'error', 'detail': detail}))
+
+    async def receive_message(self, message, client_id):
+        # Pengirim adalah user yang sudah diotorisasi saat connect
+        sender_id = self.user.pk
+
+        message_id = None
+        if not settings.CHAT_WRITE_BEHIND:
+            # Save message to database
+            message_id = await self.save_message(sender_id, message, client_id)
 
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
+                'id': message_id,
+                'client_id': str(client_id),
                 'message': message,
                 'sender_id': sender_id
             }
         )
+        # Mengirim pesan berarti berhenti mengetik
+        self.last_typing_sent = None
+
+        if settings.CHAT_WRITE_BEHIND:
+            # Disimpan belakangan secara batch (lihat chat_buffer.py)
+            await message_buffer.add(self.conversation_id, sender_id, message, client_id)
+
+    async def receive_sync(self, after_id, since):
+        try:
+            after_id, since = message_sync.parse_sync_params(after_id, since)
+        except ValueError as exc:
+            await self.send_error(str(exc))
+            return
+        if settings.CHAT_WRITE_BEHIND:
+            # Pesan yang masih di buffer belum punya id, simpan dulu
+            await message_buffer.flush()
+        # Sudah bergabung ke grup sejak connect: pesan baru datang lewat
+        # chat_message, duplikat dengan hasil sync dapat dikenali dari client_id
+        payload = await message_sync.amessages_since(self.conversation_id, after_id, since)
+        await self.send(text_data=json_dumps({'type': 'sync', **payload}))
+
+    async def receive_typing(self, is_typing):
+        now = time.monotonic()
+        if is_typing:
+            # Rate limit: cukup satu event per interval selama masih mengetik
+            if self.last_typing_sent is not None and now - self.last_typing_sent < settings.CHAT_TYPING_INTERVAL:
+                return
+            self.last_typing_sent = now
+        else:
+            if self.last_typing_sent is None:
+                return
+            self.last_typing_sent = None
+        await self.broadcast_typing(is_typing)
+
+    def queue_read_receipt(self, message_id):
+        """
+        Remember how far the user has read; the receipts collected during
+        ``CHAT_READ_RECEIPT_DELAY`` are applied together.
+        """
+        if message_id is None:
+            self.read_all = True
+        else:
+            self.read_up_to = max(self.read_up_to or 0, int(message_id))
+        if self.read_task is None:
+            self.read_task = asyncio.create_task(self.flush_read_receipt_later())
+
+    async def flush_read_receipt_later(self):
+        await asyncio.sleep(settings.CHAT_READ_RECEIPT_DELAY)
+        self.read_task = None
+        await self.flush_read_receipt()
+
+    async def flush_read_receipt(self):
+        if not self.read_all and self.read_up_to is None:
+            return
+        message_id = None if self.read_all else self.read_up_to
+        self.read_all, self.read_up_to = False, None
+
+        updated = await database_sync_to_async(unread.mark_read_until)(
+            self.conversation_id, self.user.pk, message_id
+        )
+        if updated:
+            await self.channel_layer.group_send(self.room_group_name, {
+                'type': 'chat_read',
+                'user_id': self.user.pk,
+                'message_id': message_id,
+            })
+
+    async def broadcast_typing(self, is_typing):
+        await self.channel_layer.group_send(self.room_group_name, {
+            'type': 'chat_typing',
+            'user_id': self.user.pk,
+            'is_typing': is_typing,
+        })
+
+    async def broadcast_presence(self, online):
+        await self.channel_layer.group_send(self.room_group_name, {
+            'type': 'chat_presence',
+            'user_id': self.user.pk,
+            'online': online,
+        })
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=json_dumps({
+            'type': 'message',
+            'id': event.get('id'),
+            'client_id': event.get('client_id'),
             'message': event['message'],
             'sender_id': event['sender_id']
-        }))
\ No newline at end of file
+        }))
+
+    async def chat_typing(self, event):
+        if event['user_id'] != self.user.pk:
+            await self.send(text_data=json_dumps({
+                'type': 'typing', 'user_id': event['user_id'], 'is_typing': event['is_typing'],
+            }))
+
+    async def chat_presence(self, event):
+        if event['user_id'] != self.user.pk:
+            await self.send(text_data=json_dumps({
+                'type': 'presence', 'user_id': event['user_id'], 'online': event['online'],
+            }))
+
+    async def chat_read(self, event):
+        if event['user_id'] != self.user.pk:
+            await self.send(text_data=json_dumps({
+                'type': 'read', 'user_id': event['user_id'], 'message_id': event['message_id'],
+            }))
+
+    @database_sync_to_async
+    def save_message(self, sender_id, content, client_id):
+        with transaction.atomic():
+            message = Message.objects.create(
+                conversation_id=self.conversation_id,
+                sender_id=sender_id,
+                content=content,
+                client_id=client_id,
+            )
+            unread.record_messages(self.conversation_id, sender_id, preview=content)
+        return message.pk
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Push channel of the current user (group ``user_<id>``): booking status
+    changes, new messages and payment updates, see ``notifications.py``.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if self.user is None or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = notifications.group_name(self.user.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if getattr(self, 'group_name', None):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notify(self, event):
+        await self.send(text_data=json_dumps({
+            'type': event['event'],
+            'data': event['data'],
+        }))
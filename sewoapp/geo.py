@@ -0,0 +1,176 @@
+"""
+Nearest-vehicle search on plain B-tree indexes.
+
+Every vehicle with coordinates stores its geohash (``Vehicle.geohash``),
+a base-32 string whose prefixes are nested grid cells: vehicles in the same
+cell share a prefix and therefore sit in one contiguous range of the index.
+A radius query picks the geohash length whose cells are at least as large
+as the radius, so the circle always lies inside the 3x3 block of cells
+around the center, and reads those (at most nine) index ranges. The exact
+haversine distance is then computed in Python for the candidates only.
+
+``nearby`` without a radius looks for the nearest vehicles by doubling the
+radius until enough are found, so its cost follows the local density of the
+fleet rather than its total size. No PostGIS or database math functions
+are needed.
+"""
+import math
+
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9  # sel ~4.8 x 4.8 meter
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+# Radius awal pencarian kendaraan terdekat, dilipatgandakan sampai cukup hasil
+INITIAL_RADIUS_KM = 1.0
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        # Bit genap membagi longitude, bit ganjil membagi latitude
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """
+    ``(latitude span, longitude span)`` in degrees of a cell of ``precision``.
+    """
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def precision_for(latitude, radius_km):
+    """
+    The longest geohash whose cells span at least ``radius_km`` in both
+    directions at ``latitude``.
+    """
+    lat_degrees = radius_km / KM_PER_DEGREE
+    # Lingkaran paling lebar (dalam derajat longitude) di sisi yang paling jauh dari khatulistiwa
+    farthest = min(90.0, abs(latitude) + lat_degrees)
+    lon_degrees = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(farthest)), 1e-6))
+    for precision in range(PRECISION, 0, -1):
+        lat_span, lon_span = cell_size(precision)
+        if lat_span >= lat_degrees and lon_span >= lon_degrees:
+            return precision
+    return 0
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes of the cell containing the point and its neighbours,
+    together covering every point within ``radius_km``. An empty prefix
+    means the whole world.
+    """
+    precision = precision_for(latitude, radius_km)
+    if precision == 0:
+        return ['']
+    lat_span, lon_span = cell_size(precision)
+    cells = set()
+    for dlat in (-1, 0, 1):
+        neighbour_lat = latitude + dlat * lat_span
+        if not -90 <= neighbour_lat <= 90:
+            continue
+        for dlon in (-1, 0, 1):
+            # Longitude melingkar di garis tanggal internasional
+            neighbour_lon = (longitude + dlon * lon_span + 180) % 360 - 180
+            cells.add(encode(neighbour_lat, neighbour_lon, precision))
+    return sorted(cells)
+
+
+def prefix_ranges(prefixes, column='geohash'):
+    """
+    ``Q`` matching values starting with one of ``prefixes``, written as
+    ranges so that both PostgreSQL and SQLite read them from the B-tree
+    index (``LIKE 'abc%'`` needs a special operator class or collation).
+    """
+    condition = Q()
+    for prefix in prefixes:
+        if not prefix:
+            return Q(**{f'{column}__isnull': False})
+        # '~' lebih besar dari semua karakter base32
+        condition |= Q(**{f'{column}__gte': prefix, f'{column}__lt': prefix + '~'})
+    return condition
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def candidates(queryset, latitude, longitude, radius_km):
+    """
+    ``(pk, latitude, longitude)`` rows of ``queryset`` in the cells covering
+    the circle, read through the ``geohash`` index.
+    """
+    lat_degrees = radius_km / KM_PER_DEGREE
+    return queryset.filter(
+        prefix_ranges(covering_cells(latitude, longitude, radius_km)),
+        # Kotak pembatas menyaring sisa sel tetangga sebelum dihitung di Python
+        latitude__gte=latitude - lat_degrees,
+        latitude__lte=latitude + lat_degrees,
+    ).values_list('pk', 'latitude', 'longitude').order_by()
+
+
+def within(queryset, latitude, longitude, radius_km):
+    """
+    ``[(distance_km, pk)]`` of the vehicles of ``queryset`` within
+    ``radius_km``, nearest first.
+    """
+    hits = []
+    for pk, lat, lon in candidates(queryset, latitude, longitude, radius_km):
+        distance = haversine_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            hits.append((distance, pk))
+    hits.sort()
+    return hits
+
+
+def nearby(queryset, latitude, longitude, limit, radius_km=None, max_radius_km=50.0):
+    """
+    The ``limit`` vehicles of ``queryset`` nearest to the point, as
+    ``(vehicles, radius searched)``; each vehicle gets ``distance_km``.
+    With ``radius_km`` only that circle is searched, otherwise the radius
+    grows from ``INITIAL_RADIUS_KM`` up to ``max_radius_km``.
+    """
+    if radius_km is not None:
+        hits = within(queryset, latitude, longitude, radius_km)
+    else:
+        radius_km = min(INITIAL_RADIUS_KM, max_radius_km)
+        while True:
+            hits = within(queryset, latitude, longitude, radius_km)
+            # Semua kendaraan dalam radius sudah diketahui: N terdekat pasti di sini
+            if len(hits) >= limit or radius_km >= max_radius_km:
+                break
+            radius_km = min(radius_km * 2, max_radius_km)
+
+    hits = hits[:limit]
+    vehicles = queryset.in_bulk([pk for _, pk in hits])
+    results = []
+    for distance, pk in hits:
+        vehicle = vehicles[pk]
+        vehicle.distance_km = round(distance, 3)
+        results.append(vehicle)
+    return results, radius_km
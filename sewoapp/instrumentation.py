@@ -0,0 +1,213 @@
+"""
+Per-request performance instrumentation (``INSTRUMENTATION_ENABLED = True``).
+
+``InstrumentationMiddleware`` and the ``measure`` context manager (used by
+``ChatConsumer`` for websocket frames) open a profile for the current
+request in a context variable. A database execute wrapper, installed on
+every new connection, adds each query to it, also when the ORM runs in a
+``sync_to_async`` thread, and ``span`` adds named timings such as JSON
+encoding (``render``, which excludes building ``serializer.data``) and QR
+rendering. When the request ends the profile is
+aggregated into the histograms of ``metrics.py``, returned as a
+``Server-Timing`` header and checked for N+1 patterns: the same SQL
+statement executed ``INSTRUMENTATION_N_PLUS_ONE_THRESHOLD`` times or more.
+
+``metrics_view`` serves the aggregates at ``/metrics`` for Prometheus,
+only to requests carrying ``METRICS_TOKEN``. The histograms live in the
+memory of one process: every worker reports its own numbers, so Prometheus
+has to scrape each worker and sum the series. When instrumentation is
+disabled the middleware removes itself from the stack and neither queries
+nor spans are timed.
+"""
+import hmac
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('sewoapp_request_profile', default=None)
+
+
+class RequestProfile:
+    __slots__ = ('endpoint', 'started', 'total', 'queries', 'db_time', 'statements', 'spans')
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.spans = {}
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        self.statements[sql] += 1
+
+    def add_span(self, name, duration):
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def repeated_statements(self, threshold):
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    # Execute wrapper (lihat install); tanpa profil aktif langsung dieksekusi
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - started)
+
+
+def install(sender=None, connection=None, **kwargs):
+    """
+    ``connection_created`` receiver adding ``record_query`` to the
+    connection. Without arguments it covers the connections already open.
+    """
+    targets = [connection] if connection is not None else connections.all(initialized_only=True)
+    for target in targets:
+        if record_query not in target.execute_wrappers:
+            target.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block as ``name`` in the current profile and in the
+    ``span_duration_seconds`` histogram.
+    """
+    if not settings.INSTRUMENTATION_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        profile = _current.get()
+        if profile is not None:
+            profile.add_span(name, duration)
+        metrics.observe('span_duration_seconds', duration, span=name)
+
+
+class measure:
+    """
+    Profile the enclosed block as one request of ``endpoint`` (sync or
+    async). Does nothing when instrumentation is disabled.
+    """
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.profile = None
+        self._token = None
+
+    def __enter__(self):
+        if settings.INSTRUMENTATION_ENABLED:
+            self.profile = RequestProfile(self.endpoint)
+            self._token = _current.set(self.profile)
+        return self.profile
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profile is not None:
+            _current.reset(self._token)
+            finish(self.profile)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.__exit__(exc_type, exc, tb)
+
+
+def finish(profile):
+    """
+    Aggregate a finished profile into the histograms and flag N+1 patterns.
+    """
+    total = profile.total = time.perf_counter() - profile.started
+    endpoint = profile.endpoint or 'unmatched'
+    metrics.observe('request_duration_seconds', total, endpoint=endpoint)
+    metrics.observe('db_duration_seconds', profile.db_time, endpoint=endpoint)
+    metrics.observe('db_queries', profile.queries, buckets=metrics.COUNT_BUCKETS, endpoint=endpoint)
+
+    for sql, count in profile.repeated_statements(settings.INSTRUMENTATION_N_PLUS_ONE_THRESHOLD):
+        metrics.incr('instrumentation.n_plus_one')
+        logger.warning("Possible N+1 in %s: %d x %s", endpoint, count, sql[:300])
+
+
+def server_timing(profile):
+    entries = [f'db;dur={profile.db_time * 1000:.2f};desc="{profile.queries} queries"']
+    entries += [f'{name};dur={duration * 1000:.2f}' for name, duration in profile.spans.items()]
+    entries.append(f'total;dur={profile.total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    # Nama URL (mis. booking-list) lebih rapi daripada route regex router DRF
+    return f'{request.method} {match.view_name or match.route}'
+
+
+class InstrumentationMiddleware:
+    """
+    Profile every request; see the module docstring. Place it first in
+    ``MIDDLEWARE`` so that the other middleware is included in the total.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with measure() as profile:
+            response = self.get_response(request)
+            profile.endpoint = endpoint_name(request)
+        return self.add_header(response, profile)
+
+    async def __acall__(self, request):
+        async with measure() as profile:
+            response = await self.get_response(request)
+            profile.endpoint = endpoint_name(request)
+        return self.add_header(response, profile)
+
+    def add_header(self, response, profile):
+        response['Server-Timing'] = server_timing(profile)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint of this process. Requires ``Authorization:
+    Bearer <METRICS_TOKEN>``; without a token configured it does not exist.
+    """
+    # Tanpa token, nama endpoint dan latensi tidak boleh terbuka untuk publik
+    if not settings.INSTRUMENTATION_ENABLED or not settings.METRICS_TOKEN:
+        raise Http404
+    expected = f'Bearer {settings.METRICS_TOKEN}'
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,101 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from sewoapp.availability import available_vehicles
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+from sewoapp.models import Booking, User, Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the availability search against a seeded table of bookings "
+        "(default 100k), compared with loading all bookings and filtering in Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--per-vehicle', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        per_vehicle = options['per_vehicle']
+        vehicle_count = max(1, options['bookings'] // per_vehicle)
+        origin = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        with transaction.atomic():
+            owner = User.objects.create_user(
+                username='bench-availability-partner', email='bench-availability-partner@bench.local',
+                password='x', role='partner',
+            )
+            customer = User.objects.create_user(
+                username='bench-availability-customer', email='bench-availability-customer@bench.local',
+                password='x', role='customer',
+            )
+            vehicles = Vehicle.objects.bulk_create(
+                (
+                    Vehicle(
+                        owner=owner, type=rng.choice(['car', 'motorbike']), brand='Brand',
+                        model=f'Model {i}', license_plate=f'BA {i}', year=2020,
+                        daily_price=Decimal(rng.randrange(50, 1000) * 1000), location='Kota',
+                        fuel_type=rng.choice(['bbm', 'electric']),
+                    )
+                    for i in range(vehicle_count)
+                ),
+                batch_size=5000,
+            )
+
+            def bookings():
+                # Booking berurutan per kendaraan, tidak saling tumpang tindih
+                for vehicle in vehicles:
+                    start = origin
+                    for _ in range(per_vehicle):
+                        start += timedelta(days=rng.randint(0, 3))
+                        end = start + timedelta(days=rng.randint(1, 4))
+                        yield Booking(
+                            customer=customer, vehicle=vehicle, start_date=start, end_date=end,
+                            total_price=vehicle.daily_price,
+                            status=rng.choice(['pending', 'confirmed', 'completed', 'cancelled']),
+                        )
+                        start = end
+
+            Booking.objects.bulk_create(bookings(), batch_size=5000)
+            horizon = per_vehicle * 4
+
+            def random_range():
+                start = origin + timedelta(days=rng.randint(0, horizon))
+                return start, start + timedelta(days=rng.randint(1, 7))
+
+            def search(i):
+                start, end = random_range()
+                list(available_vehicles(start, end).order_by('-created_at', '-id')[:20])
+
+            def client_side(i):
+                # Cara lama: ambil semua booking lalu filter di client
+                start, end = random_range()
+                busy = {
+                    vehicle_id
+                    for vehicle_id, status, booked_from, booked_to in Booking.objects.values_list(
+                        'vehicle_id', 'status', 'start_date', 'end_date'
+                    )
+                    if status in Booking.ACTIVE_STATUSES and booked_from < end and booked_to > start
+                }
+                [v for v in Vehicle.objects.values_list('id', flat=True) if v not in busy][:20]
+
+            self.stdout.write(
+                f"{Booking.objects.count()} bookings, {vehicle_count} vehicles"
+            )
+            self.stdout.write(format_summary(
+                "availability search", summarize(*run_timed(search, options['repeat']))
+            ))
+            self.stdout.write(format_summary(
+                "load all + filter in Python", summarize(*run_timed(client_side, min(options['repeat'], 5)))
+            ))
+
+            transaction.set_rollback(True)
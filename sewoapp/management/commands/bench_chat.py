@@ -0,0 +1,98 @@
+import asyncio
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+
+from sewoapp.benchmarking import IN_MEMORY_LAYER, with_user
+from sewoapp.models import Booking, Conversation, Message, User, Vehicle
+from sewoapp.routing import websocket_urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test ChatConsumer on the in-memory channel layer and report "
+        "messages/second for one worker, with and without write-behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10)
+        parser.add_argument('--messages', type=int, default=100, help="Messages sent per client.")
+
+    def handle(self, *args, **options):
+        stamp = int(time.time())
+        customer = User.objects.create_user(
+            username=f'bench-chat-customer-{stamp}', email=f'bench-chat-customer-{stamp}@bench.local',
+            password='bench', role='customer',
+        )
+        partner = User.objects.create_user(
+            username=f'bench-chat-partner-{stamp}', email=f'bench-chat-partner-{stamp}@bench.local',
+            password='bench', role='partner',
+        )
+        vehicle = Vehicle.objects.create(
+            owner=partner, brand='Bench', model='Chat', license_plate='BENCH', year=2024,
+            daily_price=Decimal('100000'), location='Bench', fuel_type='bbm',
+        )
+        now = timezone.now()
+        booking = Booking.objects.create(
+            customer=customer, vehicle=vehicle, start_date=now,
+            end_date=now + timedelta(days=1), total_price=vehicle.daily_price,
+        )
+        conversation = Conversation.objects.create(booking=booking)
+        senders = [customer, partner]
+
+        try:
+            for write_behind in (False, True):
+                with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, CHAT_WRITE_BEHIND=write_behind):
+                    elapsed = async_to_sync(self._run)(
+                        conversation, senders, options['clients'], options['messages']
+                    )
+                sent = options['clients'] * options['messages']
+                persisted = Message.objects.filter(conversation=conversation).count()
+                self.stdout.write(
+                    f"write_behind={str(write_behind):<5}  {sent} messages in {elapsed:.2f}s  "
+                    f"{sent / elapsed:>9.1f} msg/s  persisted={persisted}"
+                )
+                Message.objects.filter(conversation=conversation).delete()
+        finally:
+            customer.delete()
+            partner.delete()
+
+    async def _run(self, conversation, senders, clients, messages):
+        router = URLRouter(websocket_urlpatterns)
+        communicators = []
+        for index in range(clients):
+            communicator = WebsocketCommunicator(
+                with_user(router, senders[index % len(senders)]), f'/ws/chat/{conversation.pk}/'
+            )
+            connected, _ = await communicator.connect()
+            assert connected, "websocket connection was rejected"
+            communicators.append(communicator)
+
+        expected = clients * messages
+
+        async def drain(communicator):
+            # Hanya frame pesan; presence/typing tidak dihitung
+            received = 0
+            while received < expected:
+                frame = await communicator.receive_json_from(timeout=30)
+                received += frame.get('type') == 'message'
+
+        async def send(communicator):
+            for i in range(messages):
+                await communicator.send_json_to({'message': f'pesan {i}'})
+
+        started = time.perf_counter()
+        receivers = [asyncio.ensure_future(drain(c)) for c in communicators]
+        await asyncio.gather(*(send(c) for c in communicators))
+        await asyncio.gather(*receivers)
+        # Disconnect flushes the write-behind buffer, so it counts towards the run
+        for communicator in communicators:
+            await communicator.disconnect()
+        return time.perf_counter() - started
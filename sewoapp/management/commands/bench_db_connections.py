@@ -0,0 +1,107 @@
+import asyncio
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory, override_settings
+
+from sewoapp import metrics
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+
+# Mode yang bisa disimulasikan dengan mengubah CONN_MAX_AGE saat runtime
+MODES = {
+    'off': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+def wsgi_caller(path):
+    # Handler asli, bukan test client: test client tidak menutup koneksi
+    # di akhir request sehingga churn koneksi tidak terlihat
+    handler = WSGIHandler()
+    environ = RequestFactory().get(path).environ
+
+    def call():
+        response = handler(dict(environ), lambda status, headers: None)
+        b''.join(response)
+        response.close()
+    return call
+
+
+def asgi_caller(path):
+    handler = ASGIHandler()
+    url = urlsplit(path)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+        'query_string': url.query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+
+    async def call():
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Client tidak pernah disconnect
+            await asyncio.Future()
+
+        async def send(message):
+            pass
+
+        await handler(dict(scope), receive, send)
+    return async_to_sync(call)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure request latency and database connections opened per request "
+        "through the WSGI and ASGI handlers, with and without persistent "
+        "connections. Run with DATABASE_POOL=native or pooler and --modes current "
+        "to measure those setups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--path', default='/api/users/?page_size=1')
+        parser.add_argument('--modes', default='off,persistent,current')
+        parser.add_argument('--interfaces', default='wsgi,asgi')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        configured = {key: connection.settings_dict.get(key) for key in MODES['off']}
+        pooled = 'pool' in connection.settings_dict.get('OPTIONS', {})
+        callers = {'wsgi': wsgi_caller, 'asgi': asgi_caller}
+
+        for mode in options['modes'].split(','):
+            if mode != 'current' and pooled:
+                self.stdout.write(f"{mode}: skipped, a native pool is configured")
+                continue
+            connection.settings_dict.update(MODES.get(mode, configured))
+
+            for interface in options['interfaces'].split(','):
+                connection.close()
+                call = callers[interface](options['path'])
+
+                created_before = metrics.get('db.connections_created.default')
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    samples, elapsed = run_timed(lambda i: call(), options['requests'])
+                created = metrics.get('db.connections_created.default') - created_before
+
+                self.stdout.write(format_summary(f"{mode:<10} {interface}", summarize(samples, elapsed)))
+                self.stdout.write(
+                    f"{'':<30} connections opened: {created} "
+                    f"({created / options['requests']:.2f} per request)"
+                )
+
+        connection.settings_dict.update(configured)
+        stats = metrics.pool_stats()
+        if stats is not None:
+            self.stdout.write(f"pool: {stats}")
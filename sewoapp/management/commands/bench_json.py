@@ -0,0 +1,62 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from sewoapp import seeding
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+from sewoapp.models import Booking, Conversation
+from sewoapp.query_plan import plan_queryset
+from sewoapp.renderers import FastJSONParser, FastJSONRenderer, orjson
+from sewoapp.serializers import BookingSerializer, ConversationSummarySerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's stdlib JSON renderer/parser with the orjson-backed "
+        "ones on real serializer output (bookings and the conversation inbox)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed; FastJSONRenderer falls back to the stdlib.")
+
+        with transaction.atomic():
+            customer, _ = seeding.seed_uniform(options['rows'])
+            payloads = {
+                'bookings': BookingSerializer(
+                    plan_queryset(Booking.objects.all(), BookingSerializer), many=True
+                ).data,
+                'conversations': ConversationSummarySerializer(
+                    plan_queryset(
+                        Conversation.objects.for_user(customer).with_summary(customer),
+                        ConversationSummarySerializer,
+                    ),
+                    many=True,
+                ).data,
+            }
+            transaction.set_rollback(True)
+
+        for name, data in payloads.items():
+            stdlib = JSONRenderer().render(data)
+            fast = FastJSONRenderer().render(data)
+            if json.loads(stdlib) != json.loads(fast):
+                raise CommandError(f"{name}: orjson output differs from the stdlib renderer")
+
+            self.stdout.write(f"{name}: {len(data)} rows, {len(fast)} bytes")
+            for label, renderer in (('stdlib', JSONRenderer()), ('orjson', FastJSONRenderer())):
+                self.stdout.write(format_summary(
+                    f"  render {label}", summarize(*run_timed(lambda i: renderer.render(data), options['repeat']))
+                ))
+            for label, parser in (('stdlib', JSONParser()), ('orjson', FastJSONParser())):
+                self.stdout.write(format_summary(
+                    f"  parse  {label}",
+                    summarize(*run_timed(lambda i: parser.parse(io.BytesIO(fast)), options['repeat'])),
+                ))
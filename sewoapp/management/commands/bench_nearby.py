@@ -0,0 +1,86 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sewoapp import geo, seeding
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+from sewoapp.models import Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/vehicles/nearby/ (geohash index) as the fleet grows: the "
+        "nearest-N query should stay roughly flat while loading every vehicle and "
+        "computing distances in Python grows with the fleet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,30000,100000', help="Comma-separated fleet sizes.")
+        parser.add_argument('--limit', type=int, default=20, help="N of the nearest-N query.")
+        parser.add_argument('--radius', type=float, default=5.0, help="Radius (km) of the radius query.")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        cities = list(seeding.CITY_CENTERS.values())
+
+        def random_point():
+            # Pencarian dari sekitar pusat kota, tempat kendaraan terkumpul
+            latitude, longitude = rng.choice(cities)
+            return (
+                rng.gauss(latitude, seeding.CITY_SPREAD_DEGREES),
+                rng.gauss(longitude, seeding.CITY_SPREAD_DEGREES),
+            )
+
+        with transaction.atomic():
+            seeded = 0
+            for step, size in enumerate(sizes):
+                # Armada ditambah bertahap; data sebelumnya dipakai ulang
+                seeding.seed(
+                    partners=max(1, (size - seeded) // 50), customers=1, vehicles=size - seeded,
+                    bookings_per_vehicle=0, conversation_ratio=0, seed=options['seed'] + step,
+                    prefix=f'bench-nearby-{step}',
+                )
+                seeded = size
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                searches = []
+
+                def nearest(i):
+                    latitude, longitude = random_point()
+                    _, radius_km = geo.nearby(Vehicle.objects.all(), latitude, longitude, options['limit'])
+                    searches.append((latitude, longitude, radius_km))
+
+                def radius(i):
+                    latitude, longitude = random_point()
+                    geo.nearby(Vehicle.objects.all(), latitude, longitude, 100, radius_km=options['radius'])
+
+                def client_side(i):
+                    # Cara lama: semua koordinat diunduh lalu diurutkan di client
+                    latitude, longitude = random_point()
+                    sorted(
+                        (geo.haversine_km(latitude, longitude, lat, lon), pk)
+                        for pk, lat, lon in Vehicle.objects.values_list('pk', 'latitude', 'longitude')
+                    )[:options['limit']]
+
+                self.stdout.write(f"\n{Vehicle.objects.count()} vehicles ({connection.vendor})")
+                self.stdout.write(format_summary(
+                    f"nearest {options['limit']}", summarize(*run_timed(nearest, options['repeat']))
+                ))
+                # Baris kandidat pada radius terakhir (tidak ikut diukur)
+                examined = [
+                    geo.candidates(Vehicle.objects.all(), *search).count() for search in searches
+                ]
+                self.stdout.write(f"  rows read from the index: {sum(examined) / len(examined):.0f} on average")
+                self.stdout.write(format_summary(
+                    f"within {options['radius']:g} km", summarize(*run_timed(radius, options['repeat']))
+                ))
+                self.stdout.write(format_summary(
+                    "load all + sort in Python", summarize(*run_timed(client_side, min(options['repeat'], 5)))
+                ))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,75 @@
+from base64 import b64encode
+from decimal import Decimal
+from urllib import parse
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from sewoapp.benchmarking import run_timed, summarize
+from sewoapp.models import User, Vehicle
+from sewoapp.pagination import TimestampCursorPagination
+
+
+def encode_cursor(position):
+    # Same encoding as CursorPagination.encode_cursor, without needing a request
+    return b64encode(parse.urlencode({'p': position}).encode('ascii')).decode('ascii')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost of fetching a deep page of /api/vehicles/ with "
+        "cursor (keyset) pagination versus LIMIT/OFFSET."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        depths = sorted({0, rows // 100, rows // 10, rows // 2, rows - 100})
+
+        with transaction.atomic():
+            owner = User.objects.create_user(
+                username='bench-pagination', email='bench-pagination@bench.local',
+                password='x', role='partner',
+            )
+            Vehicle.objects.bulk_create(
+                (
+                    Vehicle(
+                        owner=owner, brand='Brand', model=f'Model {i}', license_plate=f'BP {i}',
+                        year=2020, daily_price=Decimal('100000'), location='Kota', fuel_type='bbm',
+                    )
+                    for i in range(rows)
+                ),
+                batch_size=5000,
+            )
+
+            paginator = TimestampCursorPagination()
+            page_size = paginator.page_size
+            ordering = paginator.ordering
+            queryset = Vehicle.objects.order_by(*ordering)
+            factory = APIRequestFactory()
+
+            self.stdout.write(f"{'depth':>8}  {'offset p50':>12}  {'cursor p50':>12}")
+            for depth in depths:
+                def offset_page(i):
+                    list(queryset[depth:depth + page_size])
+
+                # Cursor yang akan dikirim client setelah membaca `depth` baris
+                params = {}
+                if depth:
+                    boundary = queryset.values_list('created_at', flat=True)[depth - 1]
+                    params['cursor'] = encode_cursor(str(boundary))
+                request = Request(factory.get('/api/vehicles/', params))
+
+                def cursor_page(i):
+                    TimestampCursorPagination().paginate_queryset(Vehicle.objects.all(), request)
+
+                offset = summarize(*run_timed(offset_page, options['repeat']))
+                keyset = summarize(*run_timed(cursor_page, options['repeat']))
+                self.stdout.write(f"{depth:>8}  {offset['p50_ms']:>10.2f}ms  {keyset['p50_ms']:>10.2f}ms")
+
+            transaction.set_rollback(True)
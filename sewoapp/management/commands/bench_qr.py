@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+from sewoapp.models import Booking, QRCode, User, Vehicle, get_qr_storage
+from sewoapp.qr import PNG_CACHE_PREFIX, create_qr_code, get_png, payload_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare booking create throughput with QR codes rendered inline "
+        "('sync') versus in the background worker pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200)
+        parser.add_argument('--mode', default='process', choices=['thread', 'process'])
+
+    def handle(self, *args, **options):
+        count = options['count']
+        stamp = int(time.time())
+        customer = User.objects.create_user(
+            username=f'bench-qr-customer-{stamp}', email=f'bench-qr-customer-{stamp}@bench.local',
+            password='bench', role='customer',
+        )
+        owner = User.objects.create_user(
+            username=f'bench-qr-partner-{stamp}', email=f'bench-qr-partner-{stamp}@bench.local',
+            password='bench', role='partner',
+        )
+        vehicle = Vehicle.objects.create(
+            owner=owner, brand='Bench', model='QR', license_plate='BENCH', year=2024,
+            daily_price=Decimal('100000'), location='Bench', fuel_type='bbm',
+        )
+
+        # Hanya data benchmark yang dibuang: cache bersama juga berisi presence,
+        # partisipan dan versi response cache
+        payloads = []
+        images = set()
+
+        def forget_payloads():
+            cache.delete_many([PNG_CACHE_PREFIX + payload_digest(payload) for payload in payloads])
+
+        def create_booking(i):
+            # Same work as BookingViewSet.perform_create; tanggal berbeda per
+            # booking karena constraint booking_no_overlap (PostgreSQL)
+            start = timezone.now() + timedelta(days=2 * i)
+            booking = Booking.objects.create(
+                customer=customer, vehicle=vehicle, start_date=start,
+                end_date=start + timedelta(days=1), total_price=vehicle.daily_price,
+            )
+            qr_data = f"Booking ID: {booking.id}, Customer: {customer.username}"
+            payloads.append(qr_data)
+            create_qr_code(qr_data, booking=booking)
+
+        try:
+            for mode in ('sync', options['mode']):
+                forget_payloads()
+                with override_settings(QR_RENDER_MODE=mode):
+                    samples, elapsed = run_timed(create_booking, count)
+                    self.stdout.write(format_summary(f"booking create [{mode}]", summarize(samples, elapsed)))
+
+                    # Waktu sampai semua QR di background selesai dirender
+                    started = time.perf_counter()
+                    while QRCode.objects.filter(
+                        booking__customer=customer, status=QRCode.STATUS_PENDING
+                    ).exists():
+                        time.sleep(0.05)
+                    drained = elapsed + time.perf_counter() - started
+                    self.stdout.write(f"{'':<32} all QR codes ready after {drained:.2f}s")
+                images.update(
+                    QRCode.objects.filter(booking__customer=customer).exclude(image='').values_list('image', flat=True)
+                )
+                Booking.objects.filter(customer=customer).delete()
+
+            payload = f"Booking ID: 0, Customer: {customer.username}"
+            payloads.append(payload)
+            get_png(payload)
+            samples, elapsed = run_timed(lambda i: get_png(payload), count)
+            self.stdout.write(format_summary("cached render (same payload)", summarize(samples, elapsed)))
+        finally:
+            images.update(
+                QRCode.objects.filter(booking__customer=customer).exclude(image='').values_list('image', flat=True)
+            )
+            customer.delete()
+            owner.delete()
+            forget_payloads()
+            # PNG hasil benchmark (payload unik per booking, tidak dipakai QR lain)
+            storage = get_qr_storage()
+            for name in images:
+                storage.delete(name)
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sewoapp import caching, seeding
+from sewoapp.availability import filter_vehicles
+from sewoapp.benchmarking import format_summary, run_timed, summarize
+from sewoapp.models import Vehicle
+from sewoapp.search import WEIGHTS, search_vehicles, terms
+
+# (nama, q, filter tambahan)
+SCENARIOS = [
+    ('exact brand + model', 'toyota avanza', {}),
+    ('typo', 'toyta inova', {}),
+    ('model + location', 'nmax denpasar', {}),
+    ('description words', 'bandara sopir', {}),
+    ('with filters', 'honda', {'type': 'motorbike', 'max_price': Decimal('100000')}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the vehicle text search (first page plus count, as served by "
+        "/api/vehicles/search/) against a seeded catalog (default 100k vehicles), "
+        "compared with loading the whole catalog and matching in Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicles', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        with transaction.atomic():
+            seeding.seed(
+                partners=max(1, options['vehicles'] // 50), customers=1, vehicles=options['vehicles'],
+                bookings_per_vehicle=0, conversation_ratio=0, seed=options['seed'], prefix='bench-search',
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"{Vehicle.objects.count()} vehicles ({connection.vendor})")
+
+            for name, query, filters in SCENARIOS:
+                def search(i):
+                    results = search_vehicles(filter_vehicles(Vehicle.objects.all(), filters), query)
+                    results.count()
+                    list(results[:page_size])
+
+                search(0)  # warmup, juga mengisi cache kosakata
+                self.stdout.write(format_summary(
+                    f"{name} ({query})", summarize(*run_timed(search, options['repeat']))
+                ))
+
+            def client_side(i):
+                # Cara lama: unduh seluruh katalog lalu cari di client
+                words = terms(SCENARIOS[0][1])
+                [
+                    row for row in Vehicle.objects.values_list(*WEIGHTS)
+                    if all(any(word in str(value or '').lower() for value in row) for word in words)
+                ][:page_size]
+
+            self.stdout.write(format_summary(
+                "load all + match in Python", summarize(*run_timed(client_side, min(options['repeat'], 5)))
+            ))
+
+            transaction.set_rollback(True)
+
+        # Kosakata pencarian di-cache per versi katalog; buang versi berisi data seed
+        caching.bump_version('vehicles')
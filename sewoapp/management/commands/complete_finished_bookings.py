@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sewoapp.audit import transition_bookings
+from sewoapp.models import Booking
+
+
+class Command(BaseCommand):
+    help = "Mark ongoing bookings whose end date has passed as completed (nightly sweep)."
+
+    def handle(self, *args, **options):
+        changed = transition_bookings(
+            Booking.objects.filter(status='ongoing', end_date__lte=timezone.now()),
+            'completed',
+            description="Completed automatically after the end date",
+        )
+        self.stdout.write(self.style.SUCCESS(f"Completed {len(changed)} booking(s)."))
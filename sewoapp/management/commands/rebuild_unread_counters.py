@@ -0,0 +1,38 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from sewoapp.models import Message, UnreadCounter
+
+
+class Command(BaseCommand):
+    help = "Recompute all unread counters from the message table."
+
+    def handle(self, *args, **options):
+        rows = Message.objects.filter(is_read=False).values(
+            'conversation_id', 'sender_id',
+            'conversation__booking__customer_id', 'conversation__booking__vehicle__owner_id',
+        ).annotate(unread=Count('id')).order_by()
+
+        counts = Counter()
+        for row in rows:
+            participants = {
+                row['conversation__booking__customer_id'],
+                row['conversation__booking__vehicle__owner_id'],
+            }
+            for user_id in participants - {row['sender_id']}:
+                counts[(user_id, row['conversation_id'])] += row['unread']
+
+        with transaction.atomic():
+            UnreadCounter.objects.all().delete()
+            UnreadCounter.objects.bulk_create(
+                (
+                    UnreadCounter(user_id=user_id, conversation_id=conversation_id, count=count)
+                    for (user_id, conversation_id), count in counts.items()
+                ),
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(counts)} unread counter(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from sewoapp import caching
+from sewoapp.models import Review, VehicleRating
+
+
+class Command(BaseCommand):
+    help = "Recompute all vehicle rating aggregates from the review table."
+
+    def handle(self, *args, **options):
+        rows = Review.objects.values('vehicle_id', 'rating').annotate(reviews=Count('id')).order_by()
+
+        aggregates = {}
+        for row in rows:
+            aggregate = aggregates.setdefault(row['vehicle_id'], VehicleRating(vehicle_id=row['vehicle_id']))
+            aggregate.count += row['reviews']
+            aggregate.total += row['rating'] * row['reviews']
+            bucket = f"rating_{row['rating']}"
+            if hasattr(aggregate, bucket):
+                setattr(aggregate, bucket, getattr(aggregate, bucket) + row['reviews'])
+
+        with transaction.atomic():
+            # Kendaraan yang kehilangan atau mendapat aggregate; cache respons-nya dibuang setelah commit
+            vehicle_ids = set(VehicleRating.objects.values_list('vehicle_id', flat=True)) | aggregates.keys()
+            VehicleRating.objects.all().delete()
+            VehicleRating.objects.bulk_create(aggregates.values(), batch_size=1000)
+            caching.invalidate('vehicles', *vehicle_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings for {len(aggregates)} vehicle(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from sewoapp.models import QRCode
+from sewoapp.qr import render_and_store
+
+
+class Command(BaseCommand):
+    help = "Render QR codes left pending or failed (e.g. after a worker restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-failed', action='store_true')
+
+    def handle(self, *args, **options):
+        statuses = [QRCode.STATUS_PENDING]
+        if options['include_failed']:
+            statuses.append(QRCode.STATUS_FAILED)
+
+        pending = QRCode.objects.filter(status__in=statuses).values_list('id', 'qr_code_data')
+        count = 0
+        for qr_code_id, data in pending.iterator():
+            render_and_store(qr_code_id, data)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {count} QR code(s)."))
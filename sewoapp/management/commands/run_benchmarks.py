@@ -0,0 +1,237 @@
+import asyncio
+import json
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from sewoapp.benchmarking import (
+    IN_MEMORY_LAYER,
+    compare,
+    format_comparison,
+    format_summary,
+    summarize,
+    with_user,
+)
+from sewoapp.models import Conversation, Message, Vehicle
+from sewoapp.routing import websocket_urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "End-to-end benchmark of the API endpoints (through the Django test "
+        "client, inside a rolled-back transaction) and of ChatConsumer (on the "
+        "in-memory channel layer) against data created by seed_data. Reports "
+        "throughput and latency percentiles per scenario, can save the run as "
+        "JSON and compare it with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per HTTP scenario.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per scenario.")
+        parser.add_argument('--chat-clients', type=int, default=4)
+        parser.add_argument('--chat-messages', type=int, default=50, help="Messages sent per chat client.")
+        parser.add_argument('--only', action='append', default=[], help="Run only scenarios starting with this name.")
+        parser.add_argument('--prefix', default='seed', help="Username prefix used by seed_data.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="JSON file of an earlier run to compare with.")
+        parser.add_argument(
+            '--max-regression', type=float,
+            help="With --compare: fail if a p95 latency grew by more than this many percent.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        customer, partner, conversation, vehicle_ids = self._fixtures(options['prefix'])
+
+        results = {}
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, user, request in self._http_scenarios(customer, partner, conversation, vehicle_ids, rng):
+                if self._selected(name, options['only']):
+                    results[name] = self._run_http(name, user, request, options['requests'], options['warmup'])
+            # Tulisan dari skenario POST tidak disimpan
+            transaction.set_rollback(True)
+
+        if self._selected('chat.message', options['only']):
+            results['chat.message'] = self._run_chat(
+                customer, partner, conversation.booking, options['chat_clients'], options['chat_messages']
+            )
+
+        for name, summary in results.items():
+            self.stdout.write(format_summary(name, summary))
+
+        run = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'options': {
+                key: options[key] for key in ('requests', 'warmup', 'chat_clients', 'chat_messages', 'prefix', 'seed')
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fp:
+                json.dump(run, fp, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as fp:
+                baseline = json.load(fp)
+            rows = compare(baseline['results'], results)
+            self.stdout.write(f"\nCompared with {options['compare']} ({baseline['created_at']}):")
+            for line in format_comparison(rows):
+                self.stdout.write(line)
+
+            limit = options['max_regression']
+            regressions = [
+                name for name, metric, _, _, change in rows
+                if limit is not None and metric == 'p95_ms' and change > limit
+            ]
+            if regressions:
+                raise CommandError(f"p95 latency regressed by more than {limit}% in: {', '.join(regressions)}")
+
+    def _selected(self, name, only):
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    def _fixtures(self, prefix):
+        # Pelanggan seed pertama yang punya percakapan, dan pemilik kendaraannya
+        conversation = (
+            Conversation.objects.filter(booking__customer__username__startswith=f'{prefix}-customer-')
+            .select_related('booking__customer', 'booking__vehicle__owner')
+            .order_by('pk')
+            .first()
+        )
+        if conversation is None:
+            raise CommandError(f"No seeded data with prefix '{prefix}'; run seed_data first.")
+        vehicle_ids = list(
+            Vehicle.objects.filter(owner__username__startswith=f'{prefix}-partner-')
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        return conversation.booking.customer, conversation.booking.vehicle.owner, conversation, vehicle_ids
+
+    def _http_scenarios(self, customer, partner, conversation, vehicle_ids, rng):
+        """
+        ``(name, user, request)`` where ``request(i)`` returns
+        ``(method, path, data, expected_status)``.
+        """
+        now = timezone.now().replace(microsecond=0)
+        start = (now + timedelta(days=7)).isoformat()
+        end = (now + timedelta(days=10)).isoformat()
+        messages = f'/api/conversations/{conversation.pk}/messages/'
+        last_id = Message.objects.filter(conversation=conversation).order_by('-id').values_list('id', flat=True).first()
+        sync_after = max(0, (last_id or 0) - 20)
+
+        def vehicle_id():
+            return rng.choice(vehicle_ids)
+
+        def new_booking(i):
+            # Jauh di masa depan dan bergeser per request: tidak pernah bentrok
+            booking_start = now + timedelta(days=3650 + 7 * i)
+            return ('post', '/api/bookings/', {
+                'vehicle_id': vehicle_ids[i % len(vehicle_ids)],
+                'start_date': booking_start.isoformat(),
+                'end_date': (booking_start + timedelta(days=2)).isoformat(),
+            }, 201)
+
+        return [
+            ('vehicles.list', customer, lambda i: ('get', '/api/vehicles/', None, 200)),
+            ('vehicles.detail', customer, lambda i: ('get', f'/api/vehicles/{vehicle_id()}/', None, 200)),
+            ('vehicles.available', customer, lambda i: (
+                'get', '/api/vehicles/available/',
+                {'start_date': start, 'end_date': end, 'type': 'car'}, 200,
+            )),
+            ('vehicles.quote', customer, lambda i: (
+                'get', f'/api/vehicles/{vehicle_id()}/quote/', {'start_date': start, 'end_date': end}, 200,
+            )),
+            ('bookings.list', customer, lambda i: ('get', '/api/bookings/', None, 200)),
+            ('bookings.create', customer, new_booking),
+            ('conversations.list', customer, lambda i: ('get', '/api/conversations/', None, 200)),
+            ('conversations.partner', partner, lambda i: ('get', '/api/conversations/', None, 200)),
+            ('conversations.unread', customer, lambda i: ('get', '/api/conversations/unread/', None, 200)),
+            ('messages.list', customer, lambda i: ('get', messages, None, 200)),
+            ('messages.sync', customer, lambda i: ('get', messages, {'after_id': sync_after}, 200)),
+            ('messages.create', customer, lambda i: ('post', messages, {'content': f'Benchmark {i}'}, 201)),
+        ]
+
+    def _run_http(self, name, user, request, iterations, warmup):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def call(i):
+            method, path, data, expected = request(i)
+            kwargs = {'format': 'json'} if method == 'post' else {}
+            response = getattr(client, method)(path, data, **kwargs)
+            if response.status_code != expected:
+                raise CommandError(f"{name}: {method.upper()} {path} returned {response.status_code}")
+
+        for i in range(warmup):
+            call(iterations + i)
+        samples = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            t0 = time.perf_counter()
+            call(i)
+            samples.append(time.perf_counter() - t0)
+        return summarize(samples, time.perf_counter() - started)
+
+    def _run_chat(self, customer, partner, booking, clients, messages):
+        # Percakapan sementara, dihapus beserta pesannya setelah diukur
+        conversation = Conversation.objects.create(booking=booking)
+        try:
+            with override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER):
+                samples, elapsed = async_to_sync(self._chat)(
+                    conversation, [customer, partner], clients, messages
+                )
+        finally:
+            conversation.delete()
+        return summarize(samples, elapsed)
+
+    async def _chat(self, conversation, senders, clients, messages):
+        """
+        Latency of each message from ``send`` until a separate listener
+        connection receives it, with ``clients`` senders in parallel.
+        """
+        router = URLRouter(websocket_urlpatterns)
+        path = f'/ws/chat/{conversation.pk}/'
+        listener = WebsocketCommunicator(with_user(router, senders[0]), path)
+        communicators = [
+            WebsocketCommunicator(with_user(router, senders[index % len(senders)]), path)
+            for index in range(clients)
+        ]
+        for communicator in [listener, *communicators]:
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise CommandError("websocket connection was rejected")
+
+        sent_at = {}
+        samples = []
+
+        async def listen():
+            while len(samples) < clients * messages:
+                frame = await listener.receive_json_from(timeout=30)
+                if frame.get('type') == 'message':
+                    samples.append(time.perf_counter() - sent_at.pop(frame['message']))
+
+        async def send(index, communicator):
+            for i in range(messages):
+                content = f'{index}:{i}'
+                sent_at[content] = time.perf_counter()
+                await communicator.send_json_to({'message': content})
+
+        started = time.perf_counter()
+        receiver = asyncio.ensure_future(listen())
+        await asyncio.gather(*(send(index, c) for index, c in enumerate(communicators)))
+        await receiver
+        elapsed = time.perf_counter() - started
+
+        for communicator in [listener, *communicators]:
+            await communicator.disconnect()
+        return samples, elapsed
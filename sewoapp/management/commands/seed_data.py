@@ -0,0 +1,53 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sewoapp import caching, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, vehicles, bookings, payments, "
+        "reviews, conversations and messages for benchmarks (see sewoapp/seeding.py). "
+        f"Seeded users can log in with the password '{seeding.DEFAULT_PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partners', type=int, default=50)
+        parser.add_argument('--customers', type=int, default=500)
+        parser.add_argument('--vehicles', type=int, default=1000)
+        parser.add_argument('--bookings-per-vehicle', type=int, default=10, help="Average.")
+        parser.add_argument('--messages-per-conversation', type=int, default=20, help="Average.")
+        parser.add_argument('--conversation-ratio', type=float, default=0.4, help="Share of bookings with a chat.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='seed', help="Username prefix of the seeded users.")
+        parser.add_argument('--clear', action='store_true', help="Delete data seeded earlier with the same prefix first.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            if options['clear']:
+                deleted = seeding.clear(options['prefix'])
+                self.stdout.write(f"Deleted {deleted} row(s) seeded with prefix '{options['prefix']}'.")
+
+            result = seeding.seed(
+                partners=options['partners'],
+                customers=options['customers'],
+                vehicles=options['vehicles'],
+                bookings_per_vehicle=options['bookings_per_vehicle'],
+                messages_per_conversation=options['messages_per_conversation'],
+                conversation_ratio=options['conversation_ratio'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+            )
+            # Bulk insert melewati signals: agregat dihitung ulang sekali
+            call_command('rebuild_vehicle_ratings', stdout=self.stdout)
+            call_command('rebuild_unread_counters', stdout=self.stdout)
+            caching.invalidate('vehicles')
+
+        summary = ', '.join(f"{count} {name}" for name, count in result.counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary} in {time.perf_counter() - started:.1f}s."
+        ))
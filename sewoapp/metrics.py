@@ -0,0 +1,126 @@
+"""
+In-process counters for cache hits/misses, database connection churn and
+similar events, plus the latency histograms of ``instrumentation.py``.
+``render_prometheus`` exposes both in the Prometheus text format; every
+worker process keeps its own values.
+"""
+import bisect
+import re
+import threading
+from collections import Counter
+
+# Batas bucket histogram, sama dengan default client Prometheus (detik)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_counters = Counter()
+_histograms = {}
+_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Satu slot per bucket plus satu untuk +Inf (tidak kumulatif)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def get(name):
+    return _counters[name]
+
+
+def snapshot():
+    with _lock:
+        return dict(_counters)
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    """
+    Add ``value`` to the histogram ``name`` with the given labels.
+    """
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _metric_name(name, prefix):
+    return f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def render_prometheus(prefix='sewoapp'):
+    """
+    All counters and histograms in the Prometheus text exposition format.
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (name, labels, list(h.counts), h.sum, h.buckets) for (name, labels), h in _histograms.items()
+        )
+
+    lines = []
+    for name, value in counters:
+        metric = _metric_name(name, prefix) + '_total'
+        lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+
+    declared = set()
+    for name, labels, counts, total, buckets in histograms:
+        metric = _metric_name(name, prefix)
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f'# TYPE {metric} histogram')
+        cumulative = 0
+        for bound, count in zip((*buckets, '+Inf'), counts):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels((*labels, ('le', bound)))} {cumulative}")
+        lines.append(f'{metric}_sum{_labels(labels)} {total}')
+        lines.append(f'{metric}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def record_connection_created(sender, connection, **kwargs):
+    # Koneksi baru ke database (tanpa pooling: satu per request)
+    incr(f'db.connections_created.{connection.alias}')
+
+
+def record_request_finished(sender, **kwargs):
+    incr('http.requests')
+
+
+def pool_stats(alias='default'):
+    """
+    Statistics of the psycopg connection pool of ``alias``, or None when
+    the connection is not pooled (``DATABASE_POOL`` other than 'native').
+    """
+    from django.db import connections
+
+    pool = getattr(connections[alias], 'pool', None)
+    return pool.get_stats() if pool is not None else None
@@ -1,9 +1,53 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce, Substr
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.core.files.storage import storages
 import hashlib
 import hmac
 
+from . import geo
+
+
+def get_qr_storage():
+    return storages['qrcodes']
+
+
+class TrackedFieldsMixin:
+    """
+    Remember the values of ``tracked_fields`` (attnames) as they were loaded
+    from the database, so signal handlers can see what changed without
+    re-fetching the row. New instances have no previous values.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._reset_tracked_fields()
+        return instance
+
+    def _reset_tracked_fields(self):
+        # Pakai __dict__ supaya field yang di-defer tidak memicu query
+        self._loaded_values = {
+            name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__
+        }
+
+    def previous_value(self, name):
+        return getattr(self, '_loaded_values', {}).get(name)
+
+    def has_changed(self, name):
+        loaded = getattr(self, '_loaded_values', {})
+        if name not in loaded:
+            return True
+        return loaded[name] != self.__dict__.get(name)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._reset_tracked_fields()
+
 
 # User model
 class User(AbstractUser):
@@ -25,7 +69,12 @@ class User(AbstractUser):
     
     REQUIRED_FIELDS = ['email', 'role']
 
-class Vehicle(models.Model):
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id']),
+        ]
+
+class Vehicle(TrackedFieldsMixin, models.Model):
     TYPE_CHOICES = (
         ('car', 'Car'),
         ('motorbike', 'Motorbike'),
@@ -46,16 +95,51 @@ class Vehicle(models.Model):
     description = models.TextField(blank=True, null=True)
     is_available = models.BooleanField(default=True)
     location = models.CharField(max_length=100)
+    latitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    # Diturunkan dari latitude/longitude di save(); index untuk pencarian terdekat (lihat geo.py)
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False, db_index=True)
     mileage = models.IntegerField(blank=True, null=True)
     vehicle_photo = models.URLField(blank=True, null=True)
     fuel_type = models.CharField(max_length=20, choices=FUEL_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Diisi trigger PostgreSQL dari brand/model/location/description (lihat postgres.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    tracked_fields = ('owner_id', 'daily_price')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            # Filter pencarian kendaraan (lihat availability.filter_vehicles)
+            models.Index(fields=['type', 'fuel_type', 'daily_price'], name='vehicle_search_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model} ({self.license_plate})"
 
+    def save(self, *args, **kwargs):
+        # Koordinat yang di-defer (.only()) tidak berubah, geohash juga tidak
+        if not {'latitude', 'longitude'} & self.get_deferred_fields():
+            has_point = self.latitude is not None and self.longitude is not None
+            self.geohash = geo.encode(self.latitude, self.longitude) if has_point else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+
+# Status yang membuat kendaraan tidak bisa dipesan pada rentang tanggal yang sama
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed', 'ongoing')
+
 
-class Booking(models.Model):
+class Booking(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
@@ -63,6 +147,15 @@ class Booking(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     )
+    ACTIVE_STATUSES = ACTIVE_BOOKING_STATUSES
+    # Transisi status yang diizinkan (change_status dan bulk-status)
+    ALLOWED_TRANSITIONS = {
+        'pending': ('confirmed', 'cancelled'),
+        'confirmed': ('ongoing', 'cancelled'),
+        'ongoing': ('completed',),
+        'completed': (),
+        'cancelled': (),
+    }
 
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='bookings')
@@ -75,11 +168,27 @@ class Booking(models.Model):
     special_request = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Relations used by __str__, joined by the query planner (query_plan.py)
+    str_select_related = ('customer',)
+    tracked_fields = ('status', 'customer_id', 'vehicle_id')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            # Pencarian ketersediaan; di PostgreSQL juga ada exclusion constraint
+            # booking_no_overlap dengan index GiST (lihat postgres.py)
+            models.Index(
+                fields=['vehicle', 'start_date', 'end_date'],
+                condition=models.Q(status__in=ACTIVE_BOOKING_STATUSES),
+                name='booking_active_period_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"Booking {self.id} - {self.customer.username}"
 
 
-class Payment(models.Model):
+class Payment(TrackedFieldsMixin, models.Model):
     PAYMENT_STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('paid', 'Paid'),
@@ -93,31 +202,102 @@ class Payment(models.Model):
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES)
     payment_date = models.DateTimeField()
 
+    tracked_fields = ('payment_status',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['payment_date', 'id']),
+        ]
+
     def __str__(self):
-        return f"Payment for Booking {self.booking.id}"
+        return f"Payment for Booking {self.booking_id}"
+
 
+class Review(TrackedFieldsMixin, models.Model):
+    MIN_RATING = 1
+    MAX_RATING = 5
 
-class Review(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='review')
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, related_name='reviews')
-    rating = models.IntegerField()
+    rating = models.IntegerField(
+        validators=[MinValueValidator(MIN_RATING), MaxValueValidator(MAX_RATING)]
+    )
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    str_select_related = ('customer',)
+    # Dipakai untuk memperbarui VehicleRating (lihat ratings.py)
+    tracked_fields = ('rating', 'vehicle_id')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def __str__(self):
         return f"Review by {self.customer.username}"
 
 
+class VehicleRating(models.Model):
+    """
+    Denormalized review aggregates of a vehicle, maintained by
+    ``sewoapp.ratings`` whenever a review is created, edited or deleted.
+    """
+    vehicle = models.OneToOneField(
+        Vehicle, on_delete=models.CASCADE, primary_key=True, related_name='rating'
+    )
+    count = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    # Histogram: jumlah review per nilai rating
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    @property
+    def average(self):
+        if not self.count:
+            return None
+        return round(self.total / self.count, 2)
+
+    @property
+    def histogram(self):
+        return {
+            str(value): getattr(self, f'rating_{value}')
+            for value in range(Review.MIN_RATING, Review.MAX_RATING + 1)
+        }
+
+    def __str__(self):
+        return f"Rating of vehicle {self.vehicle_id}: {self.average} ({self.count})"
+
+
 class QRCode(models.Model):
-    booking = models.OneToOneField('Booking', on_delete=models.CASCADE)
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    booking = models.OneToOneField('Booking', on_delete=models.CASCADE, null=True, blank=True)
     qr_code_data = models.TextField()
-    qr_code_image_url = models.TextField()
+    image = models.FileField(storage=get_qr_storage, blank=True)
+    image_hash = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
     is_scanned = models.BooleanField(default=False)
     scanned_at = models.DateTimeField(null=True, blank=True)
     expired_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def generate_signature(self):
         message = f"{self.booking.id}:{self.booking.customer.id}"
         signature = hmac.new(
@@ -141,16 +321,92 @@ class BookingLog(models.Model):
     changed_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Log for Booking {self.booking.id} changed to {self.new_status}"
+        return f"Log for Booking {self.booking_id} changed to {self.new_status}"
+
+class ConversationQuerySet(models.QuerySet):
+    def for_user(self, user):
+        # Booking milik user dicari lewat subquery, sehingga kedua sisi OR
+        # memakai index FK (customer, vehicle.owner) dan bukan scan + join
+        bookings = Booking.objects.filter(
+            models.Q(customer=user) |
+            models.Q(vehicle__in=Vehicle.objects.filter(owner=user).values('pk'))
+        )
+        return self.filter(booking__in=bookings.values('pk'))
+
+    def with_summary(self, user, preview_length=100):
+        """
+        Annotate the last message and the unread count for ``user`` using
+        subqueries, so an inbox page is fetched in a single query.
+        """
+        last_message = Message.objects.filter(
+            conversation=models.OuterRef('pk')
+        ).order_by('-timestamp', '-id')
+        unread = UnreadCounter.objects.filter(
+            conversation=models.OuterRef('pk'), user=user
+        ).values('count')[:1]
+
+        return self.annotate(
+            last_message_id=models.Subquery(last_message.values('id')[:1]),
+            last_message_preview=models.Subquery(
+                last_message.annotate(
+                    preview=Substr('content', 1, preview_length)
+                ).values('preview')[:1]
+            ),
+            last_message_sender_id=models.Subquery(last_message.values('sender_id')[:1]),
+            last_message_at=models.Subquery(last_message.values('timestamp')[:1]),
+            unread_count=Coalesce(models.Subquery(unread), 0),
+        )
+
 
 class Conversation(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='conversations')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ConversationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id']),
+        ]
+
 class Message(models.Model):
-    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    # Tanpa index tunggal: semua index di Meta diawali conversation
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name='messages', db_index=False
+    )
     sender = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
\ No newline at end of file
+    is_read = models.BooleanField(default=False)
+    # Id dari client (atau buffer write-behind) yang sudah dikirim ke client
+    # sebelum pesan punya pk, agar delta sync bisa dicocokkan (lihat consumers.py)
+    client_id = models.UUIDField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversation', 'timestamp', 'id']),
+            # Delta sync: pesan setelah id tertentu (lihat message_sync.py)
+            models.Index(fields=['conversation', 'id']),
+            # Dipakai oleh mark-read: hanya pesan yang belum dibaca
+            models.Index(
+                fields=['conversation', 'sender'],
+                condition=models.Q(is_read=False),
+                name='message_unread_idx',
+            ),
+        ]
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalized number of unread messages per user and conversation,
+    maintained by ``sewoapp.unread`` whenever messages are created or read.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='unread_counters')
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='unread_counters')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'conversation'], name='unique_unread_counter'),
+        ]
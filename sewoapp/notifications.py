@@ -0,0 +1,115 @@
+"""
+Per-user realtime notifications.
+
+Every authenticated websocket connected to ``ws/notifications/`` joins the
+group ``user_<id>`` (see ``NotificationConsumer``). Events are published
+with ``notify`` once the current transaction commits, so clients are never
+told about changes that were rolled back. A channel layer outage is
+logged and does not fail the request that triggered the event.
+
+Events (``type`` / ``data``):
+
+* ``booking.status``: ``{booking, previous_status, status}``, to the
+  customer and the vehicle owner
+* ``message.new``: ``{conversation, sender, count, preview}``, to the other
+  participant of the conversation
+* ``payment.updated``: ``{payment, booking, payment_status, amount}``, to
+  the customer and the vehicle owner
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def group_name(user_id):
+    return f'user_{user_id}'
+
+
+def send(events):
+    """
+    Publish ``(user_ids, event_type, data)`` events right away.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    messages = [
+        (group_name(user_id), {'type': 'notify', 'event': event_type, 'data': data})
+        for user_ids, event_type, data in events
+        for user_id in set(user_ids)
+        if user_id is not None
+    ]
+    if not messages:
+        return
+    # Satu async_to_sync (satu event loop/koneksi) untuk semua event, bukan per user
+    try:
+        async_to_sync(_publish)(layer, messages)
+    except Exception:
+        logger.exception("Failed to publish %d notification(s)", len(messages))
+
+
+async def _publish(layer, messages):
+    results = await asyncio.gather(
+        *(layer.group_send(group, message) for group, message in messages), return_exceptions=True
+    )
+    for (group, message), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "Failed to publish %s notification to %s", message['event'], group, exc_info=result
+            )
+
+
+def notify(user_ids, event_type, data):
+    """
+    Publish an event to ``user_ids`` after the current transaction commits.
+    ``user_ids`` may be a callable, evaluated after commit (e.g. a query).
+    """
+    notify_many([(user_ids, event_type, data)])
+
+
+def notify_many(events):
+    def publish():
+        send([
+            (user_ids() if callable(user_ids) else user_ids, event_type, data)
+            for user_ids, event_type, data in events
+        ])
+
+    if events:
+        transaction.on_commit(publish)
+
+
+def booking_participants(booking_id):
+    """
+    Callable returning the customer and vehicle owner of a booking.
+    """
+    from .models import Booking
+
+    def resolve():
+        return Booking.objects.filter(pk=booking_id).values_list(
+            'customer_id', 'vehicle__owner_id'
+        ).first() or ()
+    return resolve
+
+
+def booking_recipients(booking):
+    """
+    Customer and vehicle owner of ``booking``, without a query when the
+    vehicle is already loaded.
+    """
+    from .models import Booking
+
+    if Booking.vehicle.is_cached(booking):
+        return (booking.customer_id, booking.vehicle.owner_id)
+    return booking_participants(booking.pk)
+
+
+def booking_status_event(booking_id, previous_status, status, user_ids):
+    return (user_ids, 'booking.status', {
+        'booking': booking_id,
+        'previous_status': previous_status,
+        'status': status,
+    })
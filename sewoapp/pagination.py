@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TimestampCursorPagination(CursorPagination):
+    """
+    Keyset pagination on a timestamp column, with ``id`` as tie-breaker.
+
+    Views pick their column with ``cursor_ordering``; each ordering has a
+    matching composite index in ``models.py`` so that deep pages cost the
+    same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page numbers for ranked search results: the order comes from a relevance
+    score rather than a column, so there is no keyset to paginate on.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
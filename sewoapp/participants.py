@@ -0,0 +1,79 @@
+"""
+Resolve who takes part in a conversation.
+
+The two participants of a conversation (the booking's customer and the
+vehicle owner) are fetched with a single query and cached for
+``PARTICIPANT_CACHE_TIMEOUT`` seconds. ``signals.py`` invalidates the cache
+when a booking, vehicle or conversation changes; since every worker must see
+that, the cache is only used with a shared ``CACHE_URL`` (the timeout is 0,
+and every lookup queries the database, on a per-process cache). REST views additionally
+memoize the lookup per request, and ChatConsumer resolves it once on connect.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Conversation
+
+CACHE_PREFIX = 'conversation-participants:'
+
+
+def _cache_key(conversation_id):
+    return f'{CACHE_PREFIX}{conversation_id}'
+
+
+def _participants_query(conversation_id):
+    return Conversation.objects.filter(pk=conversation_id).values_list(
+        'booking__customer_id', 'booking__vehicle__owner_id'
+    )
+
+
+def get_participants(conversation_id):
+    """
+    Return ``(customer_id, owner_id)``, or None if the conversation does not exist.
+    """
+    if not settings.PARTICIPANT_CACHE_TIMEOUT:
+        participants = _participants_query(conversation_id).first()
+        return tuple(participants) if participants is not None else None
+
+    key = _cache_key(conversation_id)
+    participants = cache.get(key)
+    if participants is None:
+        participants = _participants_query(conversation_id).first()
+        if participants is not None:
+            cache.set(key, participants, settings.PARTICIPANT_CACHE_TIMEOUT)
+    return tuple(participants) if participants is not None else None
+
+
+async def aget_participants(conversation_id):
+    if not settings.PARTICIPANT_CACHE_TIMEOUT:
+        participants = await _participants_query(conversation_id).afirst()
+        return tuple(participants) if participants is not None else None
+
+    key = _cache_key(conversation_id)
+    participants = await cache.aget(key)
+    if participants is None:
+        participants = await _participants_query(conversation_id).afirst()
+        if participants is not None:
+            await cache.aset(key, participants, settings.PARTICIPANT_CACHE_TIMEOUT)
+    return tuple(participants) if participants is not None else None
+
+
+def get_participants_for_request(request, conversation_id):
+    """
+    Same as ``get_participants``, memoized on the request object.
+    """
+    memo = getattr(request, '_conversation_participants', None)
+    if memo is None:
+        memo = request._conversation_participants = {}
+    conversation_id = int(conversation_id)
+    if conversation_id not in memo:
+        memo[conversation_id] = get_participants(conversation_id)
+    return memo[conversation_id]
+
+
+def is_participant(participants, user):
+    return bool(participants) and user.is_authenticated and user.pk in participants
+
+
+def invalidate(conversation_ids):
+    cache.delete_many([_cache_key(conversation_id) for conversation_id in conversation_ids])
@@ -0,0 +1,121 @@
+"""
+PostgreSQL-only schema objects.
+
+Migrations are generated at deploy time with ``makemigrations``, so objects
+Django cannot express portably (extensions, exclusion constraints, triggers,
+GIN indexes) are installed here from a ``post_migrate`` handler instead.
+Every statement is idempotent and the handler does nothing on other
+databases.
+
+A constraint is only added once no existing row violates it: the handler
+first runs the constraint's conflict query and, if it returns rows, reports
+them and leaves the constraint out instead of failing ``migrate`` with a
+database error. It is added by the first ``migrate`` after the data is
+cleaned up.
+"""
+import logging
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = [
+    'btree_gist',
+    'pg_trgm',
+]
+
+CONSTRAINTS = {
+    # Mencegah double booking: rentang waktu booking aktif untuk kendaraan
+    # yang sama tidak boleh beririsan, juga di bawah request bersamaan
+    'booking_no_overlap': (
+        'sewoapp_booking',
+        "EXCLUDE USING gist ("
+        # GREATEST: baris lama dengan start_date > end_date menjadi rentang
+        # kosong, bukan error tstzrange (ekspresi sama dengan availability.py)
+        "vehicle_id WITH =, tstzrange(start_date, GREATEST(start_date, end_date), '[)') WITH &&"
+        ") WHERE (status IN ('pending', 'confirmed', 'ongoing'))",
+        # Booking aktif yang tumpang tindih
+        "SELECT a.id, b.id FROM sewoapp_booking a "
+        "JOIN sewoapp_booking b ON b.vehicle_id = a.vehicle_id AND b.id > a.id "
+        "AND b.status IN ('pending', 'confirmed', 'ongoing') "
+        "AND a.start_date < b.end_date AND b.start_date < a.end_date "
+        "WHERE a.status IN ('pending', 'confirmed', 'ongoing') "
+        "LIMIT 20",
+    ),
+}
+
+# Kolom Vehicle.search_vector dihitung database di setiap insert/update,
+# juga untuk bulk_create dan queryset.update() yang melewati signals.
+# Bobot: brand/model A, lokasi B, deskripsi C (lihat search.py)
+FUNCTIONS = {
+    'sewoapp_vehicle_search_vector': """
+        CREATE OR REPLACE FUNCTION sewoapp_vehicle_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('{config}', coalesce(NEW.brand, '') || ' ' || coalesce(NEW.model, '')), 'A')
+                || setweight(to_tsvector('{config}', coalesce(NEW.location, '')), 'B')
+                || setweight(to_tsvector('{config}', coalesce(NEW.description, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """,
+}
+
+TRIGGERS = {
+    'vehicle_search_vector_update': (
+        'sewoapp_vehicle',
+        'BEFORE INSERT OR UPDATE OF brand, model, location, description',
+        'sewoapp_vehicle_search_vector()',
+        # Isi kolom untuk baris yang sudah ada sebelum trigger dibuat
+        "UPDATE sewoapp_vehicle SET brand = brand WHERE search_vector IS NULL",
+    ),
+}
+
+INDEXES = {
+    # Full-text search (search_vector @@ query)
+    'vehicle_search_vector_idx': 'sewoapp_vehicle USING gin (search_vector)',
+    # Pencocokan brand/model yang toleran salah ketik (operator % pg_trgm)
+    'vehicle_brand_trgm_idx': 'sewoapp_vehicle USING gin (brand gin_trgm_ops)',
+    'vehicle_model_trgm_idx': 'sewoapp_vehicle USING gin (model gin_trgm_ops)',
+}
+
+
+def report_conflicts(name, table, rows, stdout=None):
+    described = ', '.join(f'{first} and {second} overlap' for first, second in rows)
+    message = (
+        f"Constraint {name} was not added: existing rows of {table} violate it "
+        f"({described}). Fix them and run migrate again."
+    )
+    logger.warning(message)
+    if stdout is not None:
+        stdout.write(message + '\n')
+
+
+def install_postgres_objects(using='default', stdout=None, **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for extension in EXTENSIONS:
+            cursor.execute(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+        for name, (table, definition, conflicts) in CONSTRAINTS.items():
+            cursor.execute('SELECT 1 FROM pg_constraint WHERE conname = %s', [name])
+            if cursor.fetchone() is not None:
+                continue
+            cursor.execute(conflicts)
+            rows = cursor.fetchall()
+            if rows:
+                report_conflicts(name, table, rows, stdout)
+            else:
+                cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+        for definition in FUNCTIONS.values():
+            cursor.execute(definition.format(config=settings.SEARCH_CONFIG))
+        for name, (table, events, function, backfill) in TRIGGERS.items():
+            cursor.execute('SELECT 1 FROM pg_trigger WHERE tgname = %s', [name])
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE TRIGGER {name} {events} ON {table} FOR EACH ROW EXECUTE FUNCTION {function}')
+                cursor.execute(backfill)
+        for name, definition in INDEXES.items():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
@@ -0,0 +1,62 @@
+"""
+Who is currently connected to a conversation.
+
+Presence is a per-user connection counter in the cache (Redis in
+production), expiring after ``CHAT_PRESENCE_TTL`` seconds unless refreshed by
+a heartbeat, so a worker that dies without disconnecting cannot leave a
+user online forever. Nothing is written to the database.
+
+The counters must be shared by every worker, so presence is only tracked
+with ``CHAT_PRESENCE_ENABLED``, which requires a shared ``CACHE_URL``;
+without it ``ChatConsumer`` sends no presence events.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_PREFIX = 'chat-presence:'
+
+
+def _cache_key(conversation_id, user_id):
+    return f'{CACHE_PREFIX}{conversation_id}:{user_id}'
+
+
+async def connect(conversation_id, user_id):
+    """
+    Count a new connection of the user; True if the user just came online.
+    """
+    key = _cache_key(conversation_id, user_id)
+    await cache.aadd(key, 0, settings.CHAT_PRESENCE_TTL)
+    try:
+        connections = await cache.aincr(key)
+    except ValueError:
+        # Kedaluwarsa di antara add dan incr
+        await cache.aset(key, 1, settings.CHAT_PRESENCE_TTL)
+        connections = 1
+    await cache.atouch(key, settings.CHAT_PRESENCE_TTL)
+    return connections == 1
+
+
+async def disconnect(conversation_id, user_id):
+    """
+    Drop one connection of the user; True if the user went offline.
+    """
+    key = _cache_key(conversation_id, user_id)
+    try:
+        connections = await cache.adecr(key)
+    except ValueError:
+        return True
+    if connections <= 0:
+        await cache.adelete(key)
+        return True
+    return False
+
+
+async def heartbeat(conversation_id, user_id):
+    if not await cache.atouch(_cache_key(conversation_id, user_id), settings.CHAT_PRESENCE_TTL):
+        await connect(conversation_id, user_id)
+
+
+async def online_users(conversation_id, user_ids):
+    keys = {_cache_key(conversation_id, user_id): user_id for user_id in user_ids}
+    found = await cache.aget_many(list(keys))
+    return {keys[key] for key, connections in found.items() if connections}
@@ -0,0 +1,117 @@
+"""
+Booking price computation.
+
+A booking is charged per rental day: every started 24 hours from
+``start_date`` counts as one day, priced at the vehicle's ``daily_price``
+times the multipliers for that calendar day (weekend and seasonal rules
+from ``PRICING_*`` settings).
+
+The rules are compiled once into per-day multiplier tables, and each vehicle
+gets a ``PriceTable`` that memoizes its price per (weekday, day of year).
+Tables live in process memory. They are dropped when the vehicle's
+``daily_price`` changes (see ``signals.py``) and are also rebuilt whenever
+the price they were built from no longer matches the vehicle passed in, so
+another process changing the price never yields a stale quote.
+"""
+import math
+import threading
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+
+CENT = Decimal('0.01')
+DAY = timedelta(days=1)
+# Tahun kabisat, supaya 29 Februari punya indeks sendiri
+_REFERENCE_YEAR = 2000
+
+
+def _day_of_year(day):
+    return date(_REFERENCE_YEAR, day.month, day.day).timetuple().tm_yday - 1
+
+
+class PricingRules:
+    """
+    Multiplier tables compiled from settings: one entry per weekday and
+    one per day of a leap year.
+    """
+
+    def __init__(self, weekend_multiplier, seasons):
+        weekend = Decimal(str(weekend_multiplier))
+        self.weekday = tuple(weekend if weekday >= 5 else Decimal(1) for weekday in range(7))
+
+        season = [Decimal(1)] * 366
+        for rule in seasons:
+            start = _day_of_year(date(_REFERENCE_YEAR, *rule['start']))
+            end = _day_of_year(date(_REFERENCE_YEAR, *rule['end']))
+            days = range(start, end + 1) if start <= end else [*range(start, 366), *range(0, end + 1)]
+            for index in days:
+                season[index] = Decimal(str(rule['multiplier']))
+        self.season = tuple(season)
+
+
+@lru_cache(maxsize=None)
+def get_rules():
+    return PricingRules(settings.PRICING_WEEKEND_MULTIPLIER, settings.PRICING_SEASONS)
+
+
+class PriceTable:
+    def __init__(self, daily_price, rules):
+        self.daily_price = Decimal(daily_price)
+        self.rules = rules
+        self._day_prices = {}
+
+    def day_price(self, day):
+        key = (day.weekday(), _day_of_year(day))
+        price = self._day_prices.get(key)
+        if price is None:
+            price = (
+                self.daily_price * self.rules.weekday[key[0]] * self.rules.season[key[1]]
+            ).quantize(CENT, rounding=ROUND_HALF_UP)
+            self._day_prices[key] = price
+        return price
+
+    def quote(self, start, end):
+        """
+        Return ``(days, total_price)`` for a booking from ``start`` to ``end``.
+        """
+        days = max(1, math.ceil((end - start) / DAY))
+        first_day = timezone.localtime(start).date() if timezone.is_aware(start) else start.date()
+        total = sum((self.day_price(first_day + i * DAY) for i in range(days)), Decimal(0))
+        return days, total
+
+
+_tables = {}
+_lock = threading.Lock()
+
+
+def get_price_table(vehicle):
+    table = _tables.get(vehicle.pk)
+    if table is None or table.daily_price != vehicle.daily_price:
+        table = PriceTable(vehicle.daily_price, get_rules())
+        with _lock:
+            _tables[vehicle.pk] = table
+    return table
+
+
+def invalidate(vehicle_id):
+    with _lock:
+        _tables.pop(vehicle_id, None)
+
+
+def quote(vehicle, start, end):
+    return get_price_table(vehicle).quote(start, end)
+
+
+def compute_total_price(vehicle, start, end):
+    return quote(vehicle, start, end)[1]
+
+
+def quote_many(vehicle, ranges):
+    """
+    Price several ``(start, end)`` ranges of one vehicle, e.g. for a calendar.
+    """
+    table = get_price_table(vehicle)
+    return [(start, end, *table.quote(start, end)) for start, end in ranges]
@@ -0,0 +1,157 @@
+"""
+QR code rendering outside of the request path.
+
+Views create a ``QRCode`` row in the ``pending`` state and hand the payload to
+``schedule_render``. Once the surrounding transaction commits, a dispatcher
+thread renders the PNG (in a process pool by default, since rendering is
+CPU-bound) and stores the result. Rendered images are cached by the SHA-256 of
+their payload, so identical payloads are never rendered twice.
+
+Images are written to the ``qrcodes`` storage (see ``STORAGES``) under the
+SHA-256 of the PNG itself, which also serves as the ETag of the image endpoint.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+from .instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+PNG_CACHE_PREFIX = 'qr:png:'
+
+_lock = threading.Lock()
+_dispatcher = None
+_process_pool = None
+
+
+def payload_digest(data):
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def render_png(data):
+    """
+    Render ``data`` as PNG bytes. This runs inside the worker processes,
+    so it must not touch the ORM or any other Django state.
+    """
+    img = qrcode.make(data)
+    buffer = BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+
+def store_png(png):
+    """
+    Save ``png`` to the QR storage under its content hash.
+    Returns ``(name, digest)``; identical images are stored only once.
+    """
+    from .models import get_qr_storage
+
+    storage = get_qr_storage()
+    digest = hashlib.sha256(png).hexdigest()
+    name = f"{digest}.png"
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(png))
+    return name, digest
+
+
+def _get_dispatcher():
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(
+                max_workers=settings.QR_RENDER_WORKERS,
+                thread_name_prefix='qr-render',
+            )
+        return _dispatcher
+
+
+def _get_process_pool():
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            # spawn, karena fork dari proses yang sudah punya thread tidak aman
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.QR_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _process_pool
+
+
+def get_png(data):
+    """
+    Return the PNG for ``data``, rendering it only on a content-hash cache miss.
+    """
+    key = PNG_CACHE_PREFIX + payload_digest(data)
+    png = cache.get(key)
+    if png is None:
+        with span('qr_render'):
+            if settings.QR_RENDER_MODE == 'process':
+                png = _get_process_pool().submit(render_png, data).result()
+            else:
+                png = render_png(data)
+        cache.set(key, png, settings.QR_CACHE_TIMEOUT)
+    return png
+
+
+def render_and_store(qr_code_id, data):
+    """
+    Render the image for a pending QRCode and mark it ready (or failed).
+    """
+    # Import lokal: worker process meng-import modul ini tanpa django.setup()
+    from .models import QRCode
+
+    try:
+        name, digest = store_png(get_png(data))
+    except Exception:
+        logger.exception("Failed to render QR code %s", qr_code_id)
+        QRCode.objects.filter(pk=qr_code_id).update(status=QRCode.STATUS_FAILED)
+    else:
+        QRCode.objects.filter(pk=qr_code_id).update(
+            image=name,
+            image_hash=digest,
+            status=QRCode.STATUS_READY,
+        )
+
+
+def _render_in_worker(qr_code_id, data):
+    try:
+        render_and_store(qr_code_id, data)
+    finally:
+        # Worker threads must not keep their own connections open
+        connections.close_all()
+
+
+def schedule_render(qr_code):
+    """
+    Queue rendering of ``qr_code`` once the current transaction commits.
+    With ``QR_RENDER_MODE = 'sync'`` the image is rendered inline instead.
+    """
+    if settings.QR_RENDER_MODE == 'sync':
+        render_and_store(qr_code.pk, qr_code.qr_code_data)
+        return
+
+    qr_code_id, data = qr_code.pk, qr_code.qr_code_data
+    transaction.on_commit(
+        lambda: _get_dispatcher().submit(_render_in_worker, qr_code_id, data)
+    )
+
+
+def create_qr_code(data, booking=None):
+    """
+    Create a pending QRCode for ``data`` and schedule its rendering.
+    """
+    from .models import QRCode
+
+    qr_code = QRCode.objects.create(booking=booking, qr_code_data=data)
+    schedule_render(qr_code)
+    return qr_code
@@ -0,0 +1,120 @@
+"""
+Derive select_related/prefetch_related/only() from a serializer's fields.
+
+Each related field a serializer renders is resolved against the model:
+forward FK/one-to-one relations are joined with ``select_related`` and
+reverse/many-to-many relations are fetched with ``prefetch_related``. A
+``StringRelatedField`` also pulls in the relations used by the related
+model's ``__str__`` (declared as ``str_select_related`` on the model), and
+``SerializerMethodField`` dependencies can be declared on the serializer's
+``Meta`` via ``select_related`` / ``prefetch_related``.
+"""
+import functools
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+QueryPlan = namedtuple('QueryPlan', ['select_related', 'prefetch_related', 'only'])
+
+
+def _unwrap(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        return field.child_relation
+    return field
+
+
+def _collect(serializer_class, model, prefix, in_prefetch, select, prefetch, only):
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            only = None
+            continue
+
+        child = _unwrap(field)
+        current, path, many = model, prefix, in_prefetch
+        # Follow dotted sources such as 'booking.customer' relation by relation
+        for depth, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                if depth == 0:
+                    # Properties/methods may touch any column, so don't defer anything
+                    only = None
+                break
+
+            if depth == 0 and only is not None and model_field.concrete:
+                only.add(attr)
+            if not model_field.is_relation:
+                break
+
+            to_many = model_field.many_to_many or model_field.one_to_many
+            is_last = depth == len(field.source_attrs) - 1
+            if is_last and isinstance(child, serializers.PrimaryKeyRelatedField) and not to_many:
+                # Rendered from the FK column, no join needed
+                break
+
+            path += attr
+            many = many or to_many
+            (prefetch if many else select).add(path)
+            current = model_field.related_model
+
+            if is_last:
+                if isinstance(child, serializers.BaseSerializer):
+                    _collect(type(child), current, path + '__', many, select, prefetch, None)
+                elif isinstance(child, serializers.StringRelatedField):
+                    for hint in getattr(current, 'str_select_related', ()):
+                        (prefetch if many else select).add(f'{path}__{hint}')
+            path += '__'
+    return only
+
+
+@functools.lru_cache(maxsize=None)
+def get_query_plan(serializer_class):
+    meta = serializer_class.Meta
+    select, prefetch = set(), set()
+    only = _collect(serializer_class, meta.model, '', False, select, prefetch, {'pk'})
+
+    select.update(getattr(meta, 'select_related', ()))
+    prefetch.update(getattr(meta, 'prefetch_related', ()))
+    if only is not None:
+        only.update(path.split('__')[0] for path in select)
+
+    return QueryPlan(
+        tuple(sorted(select)),
+        tuple(sorted(prefetch)),
+        tuple(sorted(only)) if only is not None else None,
+    )
+
+
+def plan_queryset(queryset, serializer_class, defer=True):
+    """
+    Apply the query plan of ``serializer_class`` to ``queryset``.
+    With ``defer=False`` all columns are loaded (use for writes).
+    """
+    plan = get_query_plan(serializer_class)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    if defer and plan.only is not None:
+        queryset = queryset.only(*plan.only)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Optimize ``get_queryset()`` for the view's serializer. Columns are
+    only deferred on safe (read) requests.
+    """
+
+    def get_queryset(self):
+        return plan_queryset(
+            super().get_queryset(),
+            self.get_serializer_class(),
+            defer=self.request.method in SAFE_METHODS,
+        )
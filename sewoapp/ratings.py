@@ -0,0 +1,60 @@
+"""
+Incrementally maintained vehicle ratings (see ``VehicleRating``).
+
+The ``Review`` signal handlers in ``signals.py`` apply each create, edit and
+delete to the aggregate row with a single ``F()`` UPDATE, so vehicle
+listings can show ratings without aggregating the reviews table.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import VehicleRating
+
+
+def _apply(vehicle_id, rating, sign):
+    changes = {
+        'count': F('count') + sign,
+        'total': F('total') + sign * rating,
+        f'rating_{rating}': F(f'rating_{rating}') + sign,
+    }
+    updated = VehicleRating.objects.filter(vehicle_id=vehicle_id).update(**changes)
+    if updated or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            VehicleRating.objects.create(
+                vehicle_id=vehicle_id, count=1, total=rating, **{f'rating_{rating}': 1}
+            )
+    except IntegrityError:
+        # Dibuat bersamaan oleh request lain
+        VehicleRating.objects.filter(vehicle_id=vehicle_id).update(**changes)
+
+
+def add_review(vehicle_id, rating):
+    _apply(vehicle_id, rating, 1)
+
+
+def remove_review(vehicle_id, rating):
+    _apply(vehicle_id, rating, -1)
+
+
+def review_saved(review, created):
+    """
+    Update the aggregates for a saved review, moving it between vehicles or
+    rating buckets when those changed.
+    """
+    with transaction.atomic():
+        if created:
+            add_review(review.vehicle_id, review.rating)
+        elif review.has_changed('rating') or review.has_changed('vehicle_id'):
+            previous_vehicle = review.previous_value('vehicle_id')
+            previous_rating = review.previous_value('rating')
+            if previous_vehicle is not None and previous_rating is not None:
+                remove_review(previous_vehicle, previous_rating)
+            add_review(review.vehicle_id, review.rating)
+
+
+def review_deleted(review):
+    # Nilai yang tersimpan di database, bukan yang mungkin diubah di memori
+    loaded = getattr(review, '_loaded_values', {})
+    remove_review(loaded.get('vehicle_id', review.vehicle_id), loaded.get('rating', review.rating))
@@ -0,0 +1,98 @@
+"""
+JSON renderer/parser backed by orjson, with DRF's stdlib implementation as
+the fallback when orjson is not installed.
+
+Output matches DRF's ``JSONEncoder``: aware UTC datetimes end in ``Z``,
+``Decimal`` values that reach the renderer unformatted become numbers
+(``DecimalField`` already renders them as strings), and lazy translation
+strings, querysets and other iterables are serialized the same way.
+``json_dumps``/``json_loads`` expose the same encoding to the chat consumer.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Tipe yang tidak dikenal orjson, disamakan dengan JSONEncoder DRF
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        try:
+            return dict(obj)
+        except (TypeError, ValueError):
+            pass
+    if hasattr(obj, '__iter__'):
+        return tuple(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(data):
+    """
+    Encode ``data`` to a JSON string.
+    """
+    with span('render'):
+        if orjson is None:
+            return JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode(data)
+        return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS).decode()
+
+
+def json_loads(data):
+    if orjson is None:
+        return json.loads(data)
+    return orjson.loads(data)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    ``JSONRenderer`` using orjson. Indented output (browsable API, or an
+    ``indent`` media type parameter) is left to the stdlib implementation.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span('render'):
+            if orjson is None or data is None:
+                return super().render(data, accepted_media_type, renderer_context)
+            if self.get_indent(accepted_media_type or '', renderer_context or {}):
+                return super().render(data, accepted_media_type, renderer_context)
+            return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,168 @@
+"""
+Ranked, typo-tolerant text search over the vehicle catalog.
+
+On PostgreSQL ``search_vehicles`` matches every search term as a prefix
+against ``Vehicle.search_vector`` (maintained by a trigger, brand and model
+weighted above location and description, see ``postgres.py``) and, to
+forgive typos, compares each term with the brand and model through pg_trgm's
+``%`` operator. Both conditions are served by GIN indexes. Results are
+ranked by ``ts_rank`` plus the best trigram similarity.
+
+Other databases (SQLite in development and tests) get the same behaviour in
+Python: candidate rows are found with ``icontains``, misspelled terms are
+corrected with ``difflib`` against the brand/model vocabulary, and the
+matches are scored with the same weights before the requested page is
+loaded. This is fine for a development catalog, not for production volumes.
+"""
+import difflib
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Greatest
+
+from . import caching
+from .models import Vehicle
+
+MAX_TERMS = 5
+WORD = re.compile(r'\w+')
+# Bobot per kolom, setara setweight A/B/C di trigger PostgreSQL
+WEIGHTS = {'brand': 1.0, 'model': 1.0, 'location': 0.4, 'description': 0.1}
+# Term yang dikoreksi (salah ketik) dihitung lebih rendah dari term yang cocok persis
+CORRECTION_WEIGHT = 0.6
+CORRECTION_CUTOFF = 0.75
+
+
+def terms(query):
+    """
+    The distinct lowercase words of ``query``, at most ``MAX_TERMS``. Single
+    characters (the 'v' of 'HR-V') match almost everything and are dropped.
+    """
+    words = []
+    for word in WORD.findall(query.lower()):
+        if len(word) > 1 and word not in words:
+            words.append(word)
+    return words[:MAX_TERMS]
+
+
+def search_vehicles(queryset, query):
+    """
+    Vehicles of ``queryset`` matching ``query``, best match first. Returns
+    a queryset on PostgreSQL and a sliceable ``RankedVehicles`` elsewhere;
+    both can be handed to a paginator.
+    """
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, words)
+    return RankedVehicles(queryset, words)
+
+
+def _postgres_search(queryset, words):
+    # Term hanya berisi karakter \w, aman dipakai sebagai tsquery mentah
+    text_query = SearchQuery(
+        ' & '.join(f'{word}:*' for word in words), search_type='raw', config=settings.SEARCH_CONFIG
+    )
+    similarity = Greatest(*(
+        TrigramSimilarity(column, word) for word in words for column in ('brand', 'model')
+    ), output_field=FloatField())
+
+    matches = Q(search_vector=text_query)
+    for word in words:
+        matches |= Q(brand__trigram_similar=word) | Q(model__trigram_similar=word)
+
+    return (
+        queryset.filter(matches)
+        .annotate(score=SearchRank(F('search_vector'), text_query) + similarity)
+        .order_by('-score', '-id')
+    )
+
+
+def vocabulary():
+    """
+    Lowercase words of all brand and model names, cached until the catalog
+    changes.
+    """
+    key = f"search-vocabulary:{caching.get_version('vehicles')}"
+    words = cache.get(key)
+    if words is None:
+        words = set()
+        for brand, model in Vehicle.objects.values_list('brand', 'model').distinct():
+            words.update(WORD.findall(f'{brand} {model}'.lower()))
+        words = sorted(words)
+        cache.set(key, words, settings.VEHICLE_CACHE_TIMEOUT)
+    return words
+
+
+class RankedVehicles:
+    """
+    Search results ranked in Python; see the module docstring. Supports
+    ``count()``, ``len()`` and slicing, which is what Django's paginator
+    needs.
+    """
+
+    def __init__(self, queryset, words):
+        self.queryset = queryset
+        self.words = words
+        self._ids = None
+
+    def corrections(self):
+        # Kata di kosakata brand/model yang mirip term, mis. 'toyta' -> 'toyota'
+        known = vocabulary()
+        return {
+            word: [
+                match for match in difflib.get_close_matches(word, known, n=3, cutoff=CORRECTION_CUTOFF)
+                if match != word
+            ]
+            for word in self.words
+        }
+
+    def ranked_ids(self):
+        if self._ids is not None:
+            return self._ids
+
+        corrections = self.corrections()
+        # Semua term cocok di salah satu kolom, atau brand/model cocok dengan
+        # salah satu term (termasuk hasil koreksi), seperti di PostgreSQL
+        all_terms = Q()
+        any_name = Q()
+        for word in self.words:
+            all_terms &= Q(*(Q(**{f'{column}__icontains': word}) for column in WEIGHTS), _connector=Q.OR)
+            for candidate in [word, *corrections[word]]:
+                any_name |= Q(brand__icontains=candidate) | Q(model__icontains=candidate)
+
+        rows = self.queryset.filter(all_terms | any_name).values_list('id', *WEIGHTS).order_by()
+        scored = []
+        for row in rows:
+            values = dict(zip(WEIGHTS, (str(value or '').lower() for value in row[1:])))
+            score = sum(self._score(word, corrections[word], values) for word in self.words)
+            scored.append((score, row[0]))
+        scored.sort(reverse=True)
+        self._ids = [pk for _, pk in scored]
+        return self._ids
+
+    def _score(self, word, corrections, values):
+        best = max((WEIGHTS[column] for column, value in values.items() if word in value), default=0.0)
+        name = f"{values['brand']} {values['model']}"
+        for candidate in corrections:
+            if candidate in name:
+                ratio = difflib.SequenceMatcher(None, word, candidate).ratio()
+                best = max(best, CORRECTION_WEIGHT * ratio)
+        return best
+
+    def count(self):
+        return len(self.ranked_ids())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        ids = self.ranked_ids()[index]
+        if not isinstance(index, slice):
+            return self.queryset.get(pk=ids)
+        objects = self.queryset.in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
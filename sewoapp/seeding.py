@@ -0,0 +1,315 @@
+"""
+Synthetic data for benchmarks and query plan checks.
+
+``seed`` fills every table with bulk inserts and skewed, roughly realistic
+distributions: a few popular partners and customers own most vehicles and
+bookings, prices depend on the vehicle type, booking status follows the
+booking dates, and conversation length varies. All seeded users share the
+username prefix so ``clear`` can remove them (and, by cascade, everything
+they own). Rating aggregates and unread counters are not maintained by bulk
+inserts; run ``rebuild_vehicle_ratings`` and ``rebuild_unread_counters``
+afterwards (``seed_data`` does).
+
+``seed_uniform`` is the small, evenly shaped counterpart used by the
+query-count tests: every list endpoint gets exactly ``size`` rows.
+"""
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from . import geo
+from .models import Booking, Conversation, Message, Payment, QRCode, Review, User, Vehicle, VehicleRating
+
+LOCATIONS = {
+    'Jakarta': 30, 'Bandung': 15, 'Surabaya': 15, 'Yogyakarta': 12,
+    'Denpasar': 12, 'Semarang': 6, 'Malang': 5, 'Medan': 5,
+}
+# Titik pusat kota; kendaraan tersebar di sekitarnya (simpangan ~8 km)
+CITY_CENTERS = {
+    'Jakarta': (-6.2088, 106.8456), 'Bandung': (-6.9175, 107.6191),
+    'Surabaya': (-7.2575, 112.7521), 'Yogyakarta': (-7.7956, 110.3695),
+    'Denpasar': (-8.6705, 115.2126), 'Semarang': (-6.9667, 110.4167),
+    'Malang': (-7.9666, 112.6326), 'Medan': (3.5952, 98.6722),
+}
+CITY_SPREAD_DEGREES = 0.07
+MODELS = {
+    'car': {
+        'Toyota': ['Avanza', 'Innova', 'Fortuner', 'Yaris', 'Rush', 'Alphard'],
+        'Honda': ['Brio', 'Jazz', 'HR-V', 'CR-V', 'Mobilio'],
+        'Daihatsu': ['Xenia', 'Terios', 'Ayla', 'Sigra'],
+        'Suzuki': ['Ertiga', 'Swift', 'XL7'],
+        'Mitsubishi': ['Xpander', 'Pajero Sport'],
+        'Hyundai': ['Creta', 'Stargazer', 'Ioniq 5'],
+    },
+    'motorbike': {
+        'Honda': ['Beat', 'Vario', 'PCX', 'Scoopy'],
+        'Yamaha': ['NMAX', 'Aerox', 'Mio', 'XMAX'],
+        'Suzuki': ['Nex', 'Address'],
+        'Kawasaki': ['Ninja', 'W175'],
+    },
+}
+COLORS = ['Hitam', 'Putih', 'Silver', 'Merah', 'Abu-abu', 'Biru']
+DESCRIPTIONS = [
+    'Kondisi terawat, servis rutin di bengkel resmi.',
+    'Cocok untuk perjalanan keluarga dan mudik.',
+    'Irit bahan bakar, nyaman untuk dalam kota.',
+    'AC dingin, audio bluetooth, siap antar jemput bandara.',
+    'Helm dua dan jas hujan disediakan.',
+    'Bisa lepas kunci atau dengan sopir.',
+]
+# Harga sewa harian rata-rata per tipe (Rupiah)
+MEDIAN_DAILY_PRICE = {'car': 350000, 'motorbike': 80000}
+RATING_WEIGHTS = [2, 3, 10, 30, 55]
+DEFAULT_PASSWORD = 'password'
+
+
+class SeedResult:
+    def __init__(self, partners, customers, vehicles, bookings, conversations, counts):
+        self.partners = partners
+        self.customers = customers
+        self.vehicles = vehicles
+        self.bookings = bookings
+        self.conversations = conversations
+        self.counts = counts
+
+
+def _popularity(rng, items):
+    # Distribusi Pareto: sedikit item mendapat sebagian besar aktivitas
+    return list(itertools.accumulate(rng.paretovariate(1.2) for _ in items))
+
+
+def _price(rng, vehicle_type):
+    price = MEDIAN_DAILY_PRICE[vehicle_type] * rng.lognormvariate(0, 0.35)
+    return Decimal(max(5000, round(price / 5000) * 5000))
+
+
+def seed(
+    partners=50, customers=500, vehicles=1000, bookings_per_vehicle=10,
+    messages_per_conversation=20, conversation_ratio=0.4, seed=1, prefix='seed',
+    batch_size=5000,
+):
+    """
+    Insert the synthetic data set and return a ``SeedResult``.
+    ``bookings_per_vehicle`` and ``messages_per_conversation`` are averages.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    origin = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=180)
+    # Satu hash untuk semua user: bisa login, tanpa biaya hashing per user
+    password = make_password(DEFAULT_PASSWORD)
+
+    partner_rows = User.objects.bulk_create(
+        (
+            User(
+                username=f'{prefix}-partner-{i}', email=f'{prefix}-partner-{i}@seed.local',
+                password=password, role='partner',
+            )
+            for i in range(partners)
+        ),
+        batch_size=batch_size,
+    )
+    customer_rows = User.objects.bulk_create(
+        (
+            User(
+                username=f'{prefix}-customer-{i}', email=f'{prefix}-customer-{i}@seed.local',
+                password=password, role='customer',
+            )
+            for i in range(customers)
+        ),
+        batch_size=batch_size,
+    )
+
+    owners = rng.choices(partner_rows, cum_weights=_popularity(rng, partner_rows), k=vehicles)
+    locations = rng.choices(list(LOCATIONS), weights=list(LOCATIONS.values()), k=vehicles)
+
+    def vehicle_rows():
+        for i, (owner, location) in enumerate(zip(owners, locations)):
+            vehicle_type = 'car' if rng.random() < 0.6 else 'motorbike'
+            brand = rng.choice(list(MODELS[vehicle_type]))
+            center_lat, center_lon = CITY_CENTERS[location]
+            latitude = round(Decimal(rng.gauss(center_lat, CITY_SPREAD_DEGREES)), 6)
+            longitude = round(Decimal(rng.gauss(center_lon, CITY_SPREAD_DEGREES)), 6)
+            # bulk_create melewati Vehicle.save(): geohash diisi di sini
+            yield Vehicle(
+                owner=owner, type=vehicle_type, brand=brand,
+                model=rng.choice(MODELS[vehicle_type][brand]), license_plate=f'{prefix.upper()} {i}',
+                color=rng.choice(COLORS), description=rng.choice(DESCRIPTIONS),
+                year=rng.randint(2012, 2025), daily_price=_price(rng, vehicle_type),
+                location=location, latitude=latitude, longitude=longitude,
+                geohash=geo.encode(latitude, longitude),
+                fuel_type='electric' if rng.random() < 0.15 else 'bbm',
+                is_available=rng.random() < 0.95, mileage=rng.randint(1000, 150000),
+            )
+
+    vehicle_rows = Vehicle.objects.bulk_create(vehicle_rows(), batch_size=batch_size)
+
+    customer_weights = _popularity(rng, customer_rows)
+
+    def booking_rows():
+        # Booking berurutan per kendaraan, tidak saling tumpang tindih
+        for vehicle in vehicle_rows:
+            start = origin + timedelta(days=rng.randint(0, 14), hours=rng.randint(6, 12))
+            for _ in range(rng.randint(0, 2 * bookings_per_vehicle)):
+                days = max(1, min(14, round(rng.expovariate(1 / 3))))
+                end = start + timedelta(days=days)
+                if rng.random() < 0.1:
+                    status = 'cancelled'
+                elif end <= now:
+                    status = 'completed'
+                elif start <= now:
+                    status = 'ongoing'
+                else:
+                    status = 'confirmed' if rng.random() < 0.6 else 'pending'
+                yield Booking(
+                    customer=rng.choices(customer_rows, cum_weights=customer_weights)[0],
+                    vehicle=vehicle, start_date=start, end_date=end,
+                    total_price=vehicle.daily_price * days, status=status,
+                    pickup_location=vehicle.location, dropoff_location=vehicle.location,
+                )
+                start = end + timedelta(days=rng.randint(0, 10))
+
+    booking_rows = Booking.objects.bulk_create(booking_rows(), batch_size=batch_size)
+
+    def payment_rows():
+        for booking in booking_rows:
+            if booking.status == 'pending':
+                if rng.random() < 0.5:
+                    continue
+                payment_status = 'pending'
+            elif booking.status == 'cancelled':
+                payment_status = 'failed' if rng.random() < 0.5 else 'paid'
+            else:
+                payment_status = 'paid'
+            yield Payment(
+                booking=booking, payment_gateway_id=f'{prefix}-{booking.pk}', amount=booking.total_price,
+                payment_method=rng.choice(['bank_transfer', 'ewallet', 'credit_card']),
+                payment_status=payment_status,
+                payment_date=booking.start_date - timedelta(days=rng.randint(1, 14)),
+            )
+
+    payment_count = len(Payment.objects.bulk_create(payment_rows(), batch_size=batch_size))
+
+    review_count = len(Review.objects.bulk_create(
+        (
+            Review(
+                booking=booking, customer=booking.customer, vehicle=booking.vehicle,
+                rating=rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0],
+                comment='Mantap' if rng.random() < 0.5 else None,
+            )
+            for booking in booking_rows
+            if booking.status == 'completed' and rng.random() < 0.6
+        ),
+        batch_size=batch_size,
+    ))
+
+    chat_bookings = [booking for booking in booking_rows if rng.random() < conversation_ratio]
+    conversation_rows = Conversation.objects.bulk_create(
+        (Conversation(booking=booking) for booking in chat_bookings), batch_size=batch_size
+    )
+
+    def message_rows():
+        for booking, conversation in zip(chat_bookings, conversation_rows):
+            participants = (booking.customer_id, booking.vehicle.owner_id)
+            length = max(1, round(rng.expovariate(1 / messages_per_conversation)))
+            # Hanya beberapa pesan terakhir yang belum dibaca
+            unread_from = length - rng.randint(0, 3)
+            for i in range(length):
+                yield Message(
+                    conversation=conversation, sender_id=participants[rng.random() < 0.45],
+                    content=f'Pesan {i}', is_read=i < unread_from,
+                )
+
+    message_count = len(Message.objects.bulk_create(message_rows(), batch_size=batch_size))
+
+    return SeedResult(
+        partners=partner_rows,
+        customers=customer_rows,
+        vehicles=vehicle_rows,
+        bookings=booking_rows,
+        conversations=conversation_rows,
+        counts={
+            'users': len(partner_rows) + len(customer_rows),
+            'vehicles': len(vehicle_rows),
+            'bookings': len(booking_rows),
+            'payments': payment_count,
+            'reviews': review_count,
+            'conversations': len(conversation_rows),
+            'messages': message_count,
+        },
+    )
+
+
+def seed_uniform(size, related=True, prefix='uniform'):
+    """
+    Insert ``size`` users, vehicles (with rating aggregates) and, with
+    ``related``, one booking, payment, review, QR code and conversation of
+    ``size`` messages per vehicle, all visible to one customer. Returns
+    ``(customer, first conversation)``; the conversation is None without
+    ``related``.
+    """
+    now = timezone.now()
+    partner = User.objects.create_user(
+        username=f'{prefix}-partner', email=f'{prefix}-partner@seed.local', password='x', role='partner'
+    )
+    customer = User.objects.create_user(
+        username=f'{prefix}-customer', email=f'{prefix}-customer@seed.local', password='x', role='customer'
+    )
+    User.objects.bulk_create(
+        User(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@seed.local', role='customer')
+        for i in range(size)
+    )
+    vehicles = Vehicle.objects.bulk_create(
+        Vehicle(
+            owner=partner, brand='Brand', model=f'Model {i}', license_plate=f'{prefix.upper()} {i}',
+            year=2020, daily_price=Decimal('100000'), location='Kota', fuel_type='bbm',
+        )
+        for i in range(size)
+    )
+    VehicleRating.objects.bulk_create(
+        VehicleRating(vehicle=vehicle, count=1, total=5, rating_5=1) for vehicle in vehicles
+    )
+    if not related:
+        return customer, None
+    bookings = Booking.objects.bulk_create(
+        Booking(
+            customer=customer, vehicle=vehicle, start_date=now,
+            end_date=now + timedelta(days=1), total_price=vehicle.daily_price,
+        )
+        for vehicle in vehicles
+    )
+    Payment.objects.bulk_create(
+        Payment(
+            booking=booking, payment_gateway_id=f'{prefix}-{booking.pk}', amount=booking.total_price,
+            payment_status='paid', payment_date=now,
+        )
+        for booking in bookings
+    )
+    Review.objects.bulk_create(
+        Review(booking=booking, customer=customer, vehicle=booking.vehicle, rating=5)
+        for booking in bookings
+    )
+    QRCode.objects.bulk_create(
+        QRCode(booking=booking, qr_code_data=f'{prefix}-{booking.pk}') for booking in bookings
+    )
+    conversations = Conversation.objects.bulk_create(
+        Conversation(booking=booking) for booking in bookings
+    )
+    Message.objects.bulk_create(
+        Message(conversation=conversation, sender=(customer, partner)[i % 2], content='halo')
+        for conversation in conversations
+        for i in range(size)
+    )
+    return customer, conversations[0]
+
+
+def clear(prefix='seed'):
+    """
+    Delete the users created by ``seed`` with ``prefix``; their vehicles,
+    bookings and the rest are removed by cascade.
+    """
+    deleted, _ = User.objects.filter(username__startswith=f'{prefix}-').delete()
+    return deleted
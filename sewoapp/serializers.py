@@ -1,5 +1,10 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import User, Vehicle, Booking, Payment, Review, QRCode, Conversation, Message
+from . import search
+from .models import User, Vehicle, VehicleRating, Booking, Payment, Review, QRCode, Conversation, Message
 
 class UserSerializer(serializers.ModelSerializer):
     # Menampilkan role dengan label (misalnya 'Partner' atau 'Customer')
@@ -15,32 +20,166 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined')
 
 
+class VehicleRatingSerializer(serializers.ModelSerializer):
+    average = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = VehicleRating
+        fields = ['count', 'average', 'histogram']
+
+
 class VehicleSerializer(serializers.ModelSerializer):
     owner = serializers.StringRelatedField(read_only=True)  # Biar owner tampil sebagai username, bukan ID
+    # Agregat review yang sudah dihitung (null bila belum ada review)
+    rating = VehicleRatingSerializer(read_only=True)
 
     class Meta:
         model = Vehicle
         fields = [
             'id', 'owner', 'type', 'brand', 'model', 'license_plate', 'year', 'color',
-            'daily_price', 'description', 'is_available', 'location', 'mileage',
-            'vehicle_photo', 'fuel_type', 'created_at'
+            'daily_price', 'description', 'is_available', 'location', 'latitude', 'longitude',
+            'mileage', 'vehicle_photo', 'fuel_type', 'rating', 'created_at'
         ]
         read_only_fields = ('id', 'owner', 'created_at')
-        
+
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("latitude and longitude must be given together.")
+        return attrs
+
+
+class NearbyVehicleSerializer(VehicleSerializer):
+    # Jarak dari titik pencarian, diisi geo.nearby()
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(VehicleSerializer.Meta):
+        fields = VehicleSerializer.Meta.fields + ['distance_km']
+
+
+def validate_rental_period(start_date, end_date):
+    # Harga dijumlahkan per hari (pricing.py): rentang dibatasi supaya murah dihitung
+    if start_date >= end_date:
+        raise serializers.ValidationError({'end_date': "End date must be after start date."})
+    if end_date - start_date > timedelta(days=settings.PRICING_MAX_RENTAL_DAYS):
+        raise serializers.ValidationError(
+            {'end_date': f"A rental may last at most {settings.PRICING_MAX_RENTAL_DAYS} days."}
+        )
+
 
 class BookingSerializer(serializers.ModelSerializer):
     customer = serializers.StringRelatedField(read_only=True)
     vehicle = serializers.StringRelatedField(read_only=True)
+    # Kendaraan yang dipesan (input), ditampilkan lewat field `vehicle`
+    vehicle_id = serializers.PrimaryKeyRelatedField(
+        source='vehicle', queryset=Vehicle.objects.all(), write_only=True
+    )
 
     class Meta:
         model = Booking
         fields = [
-            'id', 'customer', 'vehicle', 'start_date', 'end_date',
+            'id', 'customer', 'vehicle', 'vehicle_id', 'start_date', 'end_date',
             'pickup_location', 'dropoff_location', 'total_price', 'status',
             'special_request', 'created_at'
         ]
         read_only_fields = ('id', 'customer', 'created_at', 'status', 'total_price')
 
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date:
+            validate_rental_period(start_date, end_date)
+        return attrs
+
+
+class BookingStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES)
+
+
+class BookingBulkStatusSerializer(serializers.Serializer):
+    """
+    Body of /api/bookings/bulk-status/.
+    """
+    items = BookingStatusItemSerializer(many=True, allow_empty=False, max_length=500)
+    description = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_items(self, items):
+        ids = [item['id'] for item in items]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Each booking may only appear once.")
+        return items
+
+
+class DateRangeSerializer(serializers.Serializer):
+    start_date = serializers.DateTimeField()
+    end_date = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        validate_rental_period(attrs['start_date'], attrs['end_date'])
+        return attrs
+
+
+class VehicleQuoteSerializer(serializers.Serializer):
+    """
+    Body of POST /api/vehicles/<id>/quote/: many date ranges priced at once.
+    """
+    ranges = DateRangeSerializer(
+        many=True, allow_empty=False, max_length=settings.PRICING_MAX_QUOTE_RANGES
+    )
+
+
+class VehicleSearchSerializer(serializers.Serializer):
+    """
+    Query parameters of /api/vehicles/available/.
+    """
+    start_date = serializers.DateTimeField(required=False)
+    end_date = serializers.DateTimeField(required=False)
+    type = serializers.ChoiceField(choices=Vehicle.TYPE_CHOICES, required=False)
+    fuel_type = serializers.ChoiceField(choices=Vehicle.FUEL_CHOICES, required=False)
+    location = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    def validate(self, attrs):
+        if bool(attrs.get('start_date')) != bool(attrs.get('end_date')):
+            raise serializers.ValidationError("start_date and end_date must be given together.")
+        if attrs.get('start_date') and attrs['start_date'] >= attrs['end_date']:
+            raise serializers.ValidationError({'end_date': "End date must be after start date."})
+        return attrs
+
+
+class VehicleTextSearchSerializer(VehicleSearchSerializer):
+    """
+    Query parameters of /api/vehicles/search/: the search text ``q`` plus
+    the filters of /api/vehicles/available/.
+    """
+    q = serializers.CharField(min_length=2, max_length=100)
+
+    def validate_q(self, value):
+        if not search.terms(value):
+            raise serializers.ValidationError("Enter at least one word.")
+        return value
+
+
+class VehicleNearbySerializer(VehicleSearchSerializer):
+    """
+    Query parameters of /api/vehicles/nearby/: a point, an optional radius
+    (without it the nearest ``limit`` vehicles are returned) and the filters
+    of /api/vehicles/available/.
+    """
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.1, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_radius_km(self, value):
+        if value > settings.NEARBY_MAX_RADIUS_KM:
+            raise serializers.ValidationError(f"At most {settings.NEARBY_MAX_RADIUS_KM} km.")
+        return value
+
 
 class PaymentSerializer(serializers.ModelSerializer):
     booking = serializers.StringRelatedField(read_only=True)
@@ -65,17 +204,40 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ('id', 'customer', 'vehicle', 'created_at')
 
+    def validate_booking(self, booking):
+        # Hanya customer booking itu, setelah selesai, dan sekali per booking
+        request = self.context.get('request')
+        if request is None or booking.customer_id != request.user.pk:
+            raise serializers.ValidationError("You can only review your own bookings.")
+        if booking.status != 'completed':
+            raise serializers.ValidationError("Only completed bookings can be reviewed.")
+        reviews = Review.objects.filter(booking=booking)
+        if self.instance is not None:
+            reviews = reviews.exclude(pk=self.instance.pk)
+        if reviews.exists():
+            raise serializers.ValidationError("This booking has already been reviewed.")
+        return booking
+
 
 class QRCodeSerializer(serializers.ModelSerializer):
     booking = serializers.StringRelatedField(read_only=True)
+    # URL ke endpoint gambar, bukan data base64-nya
+    qr_code_image_url = serializers.SerializerMethodField()
 
     class Meta:
         model = QRCode
         fields = [
-            'id', 'booking', 'qr_code_data', 'qr_code_image_url',
+            'id', 'booking', 'qr_code_data', 'qr_code_image_url', 'status',
             'is_scanned', 'scanned_at', 'expired_at', 'created_at'
         ]
-        read_only_fields = ('id', 'booking', 'qr_code_data', 'qr_code_image_url', 'created_at')
+        read_only_fields = ('id', 'booking', 'qr_code_data', 'status', 'created_at')
+
+    def get_qr_code_image_url(self, obj):
+        if obj.status != QRCode.STATUS_READY:
+            return None
+        url = reverse('qrcode-image', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
@@ -83,7 +245,18 @@ class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = ['id', 'conversation', 'sender', 'content', 'timestamp', 'is_read']
-        read_only_fields = ['id', 'timestamp', 'sender']
+        read_only_fields = ['id', 'conversation', 'timestamp', 'sender']
+
+class MessageSyncSerializer(serializers.ModelSerializer):
+    """
+    Compact message for delta sync (see ``message_sync.py``): the sender is
+    only its id, ``client_id`` matches the message to its live frame.
+    """
+
+    class Meta:
+        model = Message
+        fields = ['id', 'client_id', 'sender', 'content', 'timestamp', 'is_read']
+        read_only_fields = fields
 
 class ConversationSerializer(serializers.ModelSerializer):
     messages = MessageSerializer(many=True, read_only=True)
@@ -94,9 +267,48 @@ class ConversationSerializer(serializers.ModelSerializer):
         model = Conversation
         fields = ['id', 'booking', 'customer', 'partner', 'messages', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        # Dipakai oleh get_customer/get_partner (lihat query_plan.py)
+        select_related = ('booking__customer', 'booking__vehicle__owner')
     
     def get_customer(self, obj):
         return UserSerializer(obj.booking.customer).data
     
     def get_partner(self, obj):
-        return UserSerializer(obj.booking.vehicle.owner).data
\ No newline at end of file
+        return UserSerializer(obj.booking.vehicle.owner).data
+
+
+class ParticipantSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'profile_picture']
+        read_only_fields = fields
+
+
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    """
+    Inbox representation: participant stubs, a preview of the last message
+    and the unread count. Expects a queryset from ``with_summary()``; the
+    full history is served by ConversationSerializer on the detail view.
+    """
+    customer = ParticipantSerializer(source='booking.customer', read_only=True)
+    partner = ParticipantSerializer(source='booking.vehicle.owner', read_only=True)
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Conversation
+        fields = [
+            'id', 'booking', 'customer', 'partner', 'last_message',
+            'unread_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_last_message(self, obj):
+        if obj.last_message_id is None:
+            return None
+        return {
+            'id': obj.last_message_id,
+            'sender': obj.last_message_sender_id,
+            'preview': obj.last_message_preview,
+            'timestamp': serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
@@ -1,47 +1,97 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Booking, BookingLog
-from django.utils import timezone
-
-@receiver(pre_save, sender=Booking)
-def save_previous_status(sender, instance, **kwargs):
-    """
-    Save the current status of the booking before it is updated,
-    so we can compare it after saving.
-    """
-    if instance.pk:
-        try:
-            existing = Booking.objects.get(pk=instance.pk)
-            instance._previous_status = existing.status
-        except Booking.DoesNotExist:
-            instance._previous_status = None
-    else:
-        instance._previous_status = None
+from . import caching, notifications, participants, pricing, ratings
+from .audit import build_log
+from .models import Booking, Conversation, Payment, Review, Vehicle
 
 @receiver(post_save, sender=Booking)
 def create_booking_log(sender, instance, created, **kwargs):
     """
     Create a booking log whenever a booking is created or its status changes.
+    The previous status comes from the instance's change tracker, so no
+    extra query is needed.
     """
     changed_by = getattr(instance, '_changed_by', None)
-    if not changed_by:
-        changed_by = instance.customer  # Default: customer is the changer if not set
+    # Default: customer is the changer if not set
+    changed_by_id = changed_by.pk if changed_by else instance.customer_id
 
     if created:
-        BookingLog.objects.create(
-            booking=instance,
-            previous_status=None,
-            new_status=instance.status,
-            description="Booking created",
-            changed_by=changed_by
-        )
-    else:
+        previous_status = None
+    elif instance.has_changed('status'):
         # Only create log if status actually changed
-        if hasattr(instance, '_previous_status') and instance.status != instance._previous_status:
-            BookingLog.objects.create(
-                booking=instance,
-                previous_status=instance._previous_status,
-                new_status=instance.status,
-                description=f"Status changed from {instance._previous_status} to {instance.status}",
-                changed_by=changed_by
-            )
+        previous_status = instance.previous_value('status')
+    else:
+        return
+
+    build_log(instance.pk, previous_status, instance.status, changed_by_id).save()
+    # Push ke customer dan pemilik kendaraan setelah commit
+    notifications.notify_many([notifications.booking_status_event(
+        instance.pk, previous_status, instance.status, notifications.booking_recipients(instance)
+    )])
+
+@receiver(post_save, sender=Booking)
+def invalidate_booking_participants(sender, instance, created, **kwargs):
+    """
+    The customer or vehicle of a booking may have changed, so drop the
+    cached participants of its conversations.
+    """
+    if not created and (instance.has_changed('customer_id') or instance.has_changed('vehicle_id')):
+        participants.invalidate(
+            Conversation.objects.filter(booking=instance).values_list('id', flat=True)
+        )
+
+@receiver(post_save, sender=Vehicle)
+def invalidate_vehicle_participants(sender, instance, created, **kwargs):
+    """
+    The owner of a vehicle is a participant in all conversations about it.
+    """
+    if not created and instance.has_changed('owner_id'):
+        participants.invalidate(
+            Conversation.objects.filter(booking__vehicle=instance).values_list('id', flat=True)
+        )
+
+@receiver(post_save, sender=Vehicle)
+def invalidate_vehicle_price_table(sender, instance, created, **kwargs):
+    if not created and instance.has_changed('daily_price'):
+        pricing.invalidate(instance.pk)
+
+@receiver(post_delete, sender=Vehicle)
+def drop_vehicle_price_table(sender, instance, **kwargs):
+    pricing.invalidate(instance.pk)
+
+@receiver(post_delete, sender=Conversation)
+def invalidate_conversation_participants(sender, instance, **kwargs):
+    participants.invalidate([instance.pk])
+
+@receiver(post_save, sender=Review)
+def update_vehicle_rating(sender, instance, created, **kwargs):
+    ratings.review_saved(instance, created)
+
+@receiver(post_delete, sender=Review)
+def remove_vehicle_rating(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_vehicle_cache(sender, instance, **kwargs):
+    caching.invalidate('vehicles', instance.pk)
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_vehicle_cache(sender, instance, **kwargs):
+    # Rating kendaraan ikut berubah; juga kendaraan lama bila review dipindah
+    caching.invalidate('vehicles', instance.vehicle_id, instance.previous_value('vehicle_id'))
+
+@receiver(post_save, sender=Payment)
+def notify_payment_update(sender, instance, created, **kwargs):
+    if created or instance.has_changed('payment_status'):
+        notifications.notify(
+            notifications.booking_participants(instance.booking_id),
+            'payment.updated',
+            {
+                'payment': instance.pk,
+                'booking': instance.booking_id,
+                'payment_status': instance.payment_status,
+                'amount': str(instance.amount),
+            },
+        )
@@ -1,3 +1,865 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import runpy
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from sewoapp import geo, message_sync, postgres, pricing, search, seeding, unread
+from sewoapp.async_api import KeysetPaginator
+from sewoapp.benchmarking import IN_MEMORY_LAYER, with_user
+from sewoapp.chat_buffer import message_buffer
+from sewoapp.models import Booking, BookingLog, Conversation, Message, UnreadCounter, User, Vehicle
+from sewoapp.query_plan import plan_queryset
+from sewoapp.routing import websocket_urlpatterns
+from sewoapp.serializers import VehicleNearbySerializer, VehicleSearchSerializer, VehicleSerializer
+from sewoapp.views import BookingViewSet, ConversationListView, MessageListView, VehicleViewSet
+
+# Jumlah query yang diharapkan per endpoint, berapapun jumlah datanya
+EXPECTED_QUERIES = {
+    '/api/users/': 1,
+    '/api/vehicles/': 1,
+    '/api/bookings/': 1,
+    '/api/payments/': 1,
+    '/api/reviews/': 1,
+    '/api/qrcodes/': 1,
+    '/api/conversations/': 1,
+    '/api/conversations/unread/': 1,
+    '/api/conversations/{conversation}/messages/': 2,
+    # Partisipan sudah di-cache oleh request sebelumnya
+    '/api/conversations/{conversation}/messages/?after_id=0': 1,
+}
+
+# Baris EXPLAIN QUERY PLAN SQLite, mis. "SEARCH sewoapp_message USING INDEX ..."
+SQLITE_ACCESS = re.compile(r'\b(SCAN|SEARCH) (\w+)(.*)$')
+# Alias tabel di subquery SQL Django, mis. '"sewoapp_message" U0'
+SQL_ALIAS = re.compile(r'"(\w+)" ([A-Z]\d+)\b')
+
+
+def table_accesses(plan, sql):
+    """
+    ``[(table, access method, full scan?)]`` for every table read in
+    ``plan``. On SQLite a ``SCAN`` reads the whole table or index, only
+    ``SEARCH`` narrows it down with an index.
+    """
+    if connection.vendor == 'postgresql':
+        accesses = []
+
+        def walk(node):
+            relation = node.get('Relation Name')
+            if relation:
+                if node['Node Type'] == 'Seq Scan':
+                    accesses.append((relation, 'Seq Scan', True))
+                else:
+                    index = node.get('Index Name')
+                    method = f"{node['Node Type']} using {index}" if index else node['Node Type']
+                    accesses.append((relation, method, False))
+            for child in node.get('Plans', ()):
+                walk(child)
+
+        # Django menggabungkan hasil JSON per baris: objek atau list objek
+        entries = json.loads(plan)
+        for entry in entries if isinstance(entries, list) else [entries]:
+            walk(entry['Plan'])
+        return accesses
+
+    # SQLite mencetak alias subquery (U0, V0, ...) yang bisa dipakai ulang
+    # di beberapa subquery; tabel diambil dari nama index bila ada
+    aliases = {}
+    for table, alias in SQL_ALIAS.findall(sql):
+        aliases.setdefault(alias, set()).add(table)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'")
+        index_tables = dict(cursor.fetchall())
+
+    accesses = []
+    for line in plan.splitlines():
+        match = SQLITE_ACCESS.search(line)
+        if not match:
+            continue
+        method, name, using = match.groups()
+        index = re.search(r'INDEX (\w+)', using)
+        if index and index.group(1) in index_tables:
+            candidates = {index_tables[index.group(1)]}
+        else:
+            candidates = aliases.get(name, {name})
+        accesses.extend((table, f'{method}{using}', method == 'SCAN') for table in sorted(candidates))
+    return accesses
+
+
+def get_view(view_class, user, path, **initkwargs):
+    """
+    An instance of the DRF view ``view_class`` set up for ``GET path`` by
+    ``user``, as ``dispatch`` would leave it before calling the handler.
+    """
+    request = APIRequestFactory().get(path)
+    force_authenticate(request, user)
+    view = view_class(**initkwargs)
+    view.setup(request)
+    view.request = view.initialize_request(request)
+    view.format_kwarg = None
+    return view
+
+
+def first_page(view, queryset):
+    # Query halaman pertama TimestampCursorPagination
+    paginator = view.paginator
+    ordering = paginator.get_ordering(view.request, queryset, view)
+    return queryset.order_by(*ordering)[:paginator.get_page_size(view.request) + 1]
+
+
+# Senin 3 Maret 2031 10:00 UTC, jauh di masa depan agar semua booking valid
+MONDAY = timezone.make_aware(datetime(2031, 3, 3, 10, 0))
+
+
+def create_user(username, role='customer'):
+    return User.objects.create_user(
+        username=username, email=f'{username}@test.local', password='x', role=role
+    )
+
+
+def create_vehicle(owner, daily_price='100000'):
+    return Vehicle.objects.create(
+        owner=owner, brand='Toyota', model='Avanza', license_plate='B 1234 XY', year=2022,
+        daily_price=Decimal(daily_price), location='Jakarta', fuel_type='bbm',
+    )
+
+
+def create_booking(customer, vehicle, start=MONDAY, days=2, status='pending'):
+    return Booking.objects.create(
+        customer=customer, vehicle=vehicle, start_date=start, end_date=start + timedelta(days=days),
+        total_price=vehicle.daily_price * days, status=status,
+    )
+
+
+# Seperti di production dengan CACHE_URL bersama (tanpa itu cache partisipan mati)
+@override_settings(PARTICIPANT_CACHE_TIMEOUT=60)
+class QueryCountTests(TestCase):
+    """
+    Query-count regression tests: every list endpoint is requested with
+    data seeded at two sizes and must use the expected number of queries,
+    which therefore does not grow with the amount of data.
+    """
+    sizes = (2, 20)
+    listing_size = 1000
+
+    def test_list_endpoints(self):
+        for size in self.sizes:
+            # Ukur dengan cache kosong (mis. cache partisipan conversation)
+            cache.clear()
+            with transaction.atomic():
+                customer, conversation = seeding.seed_uniform(size, prefix=f'qc{size}')
+                client = APIClient()
+                client.force_authenticate(customer)
+
+                for endpoint, expected in EXPECTED_QUERIES.items():
+                    url = endpoint.format(conversation=conversation.pk)
+                    with self.subTest(endpoint=endpoint, size=size), self.assertNumQueries(expected):
+                        response = client.get(url)
+                        self.assertEqual(response.status_code, 200)
+
+                transaction.set_rollback(True)
+
+    def test_vehicle_listing_with_ratings(self):
+        # Daftar kendaraan lengkap dengan rating: tetap satu query
+        seeding.seed_uniform(self.listing_size, related=False)
+        with self.assertNumQueries(1):
+            data = VehicleSerializer(plan_queryset(Vehicle.objects.all(), VehicleSerializer), many=True).data
+        self.assertEqual(len(data), self.listing_size)
+        self.assertTrue(all(item['rating'] is not None for item in data))
+
+
+class QueryPlanTests(TestCase):
+    """
+    Query plan regression tests: with a realistic volume of seeded data,
+    the main query of each hot endpoint, taken from its view, must read the
+    listed tables through an index instead of scanning them in full.
+
+    Plans are checked on whichever database runs the tests. The CI ``test``
+    job runs them against PostgreSQL; locally on SQLite only the SQLite
+    plans are covered, and the PostgreSQL-only objects are tested
+    separately in ``PostgresSchemaTests``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        result = seeding.seed(
+            partners=200, customers=2000, vehicles=5000, bookings_per_vehicle=10,
+            messages_per_conversation=20, seed=1, prefix='explain',
+        )
+        call_command('rebuild_unread_counters', stdout=io.StringIO())
+        cls.conversation = result.conversations[0]
+        cls.customer = cls.conversation.booking.customer
+        cls.vehicle = cls.conversation.booking.vehicle
+        cls.partner = cls.vehicle.owner
+        # Statistik planner harus mencerminkan volume data hasil seed
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def queries(self):
+        """
+        ``(name, queryset, tables that must be read through an index)``,
+        each queryset built by the view (or the helper it calls).
+        """
+        customer, partner, vehicle, conversation = self.customer, self.partner, self.vehicle, self.conversation
+        now = timezone.now()
+        messages_url = f'/api/conversations/{conversation.pk}/messages/'
+        search = {
+            'type': 'car', 'fuel_type': 'electric', 'min_price': '900000', 'max_price': '950000',
+            'start_date': now.isoformat(), 'end_date': (now + timedelta(days=3)).isoformat(),
+        }
+        nearby = {'latitude': vehicle.latitude, 'longitude': vehicle.longitude, 'type': 'car', 'radius_km': 2}
+
+        customer_inbox = get_view(ConversationListView, customer, '/api/conversations/')
+        partner_inbox = get_view(ConversationListView, partner, '/api/conversations/')
+        available = get_view(
+            VehicleViewSet, customer, f'/api/vehicles/available/?{urlencode(search)}',
+            action_map={'get': 'available'},
+        )
+        available_vehicles, _ = available.get_filtered_queryset(VehicleSearchSerializer)
+        nearby_view = get_view(
+            VehicleViewSet, customer, f'/api/vehicles/nearby/?{urlencode(nearby)}', action_map={'get': 'nearby'},
+        )
+        nearby_vehicles, params = nearby_view.get_filtered_queryset(VehicleNearbySerializer)
+
+        return [
+            (
+                'messages page (MessageListView)',
+                KeysetPaginator(APIRequestFactory().get(messages_url)).page_queryset(
+                    MessageListView().get_queryset(conversation.pk)
+                ),
+                {'sewoapp_message'},
+            ),
+            (
+                'message delta sync (MessageListView, ?after_id=)',
+                message_sync.sync_queryset(conversation.pk, 0, None, settings.CHAT_SYNC_MAX_MESSAGES),
+                {'sewoapp_message'},
+            ),
+            (
+                'unread messages (MarkMessagesAsReadView)',
+                unread.unread_messages(conversation.pk, customer.pk),
+                {'sewoapp_message'},
+            ),
+            (
+                'customer inbox (ConversationListView)',
+                first_page(customer_inbox, customer_inbox.get_queryset()),
+                {'sewoapp_conversation', 'sewoapp_booking', 'sewoapp_message', 'sewoapp_unreadcounter'},
+            ),
+            (
+                'partner inbox (ConversationListView)',
+                first_page(partner_inbox, partner_inbox.get_queryset()),
+                {'sewoapp_conversation', 'sewoapp_booking', 'sewoapp_vehicle', 'sewoapp_message'},
+            ),
+            (
+                'unread badges (UnreadCountView)',
+                unread.unread_counts(customer.pk),
+                {'sewoapp_unreadcounter'},
+            ),
+            (
+                'booking overlap check (BookingViewSet.create)',
+                BookingViewSet().get_clashes(vehicle, now, now + timedelta(days=3)),
+                {'sewoapp_booking'},
+            ),
+            (
+                'vehicle search with dates (VehicleViewSet.available)',
+                first_page(available, available_vehicles),
+                {'sewoapp_vehicle', 'sewoapp_booking'},
+            ),
+            (
+                'nearby vehicles (VehicleViewSet.nearby)',
+                geo.candidates(nearby_vehicles, params['latitude'], params['longitude'], params['radius_km']),
+                {'sewoapp_vehicle'},
+            ),
+        ]
+
+    def test_hot_queries_use_indexes(self):
+        explain_options = {'format': 'json'} if connection.vendor == 'postgresql' else {}
+        for name, queryset, tables in self.queries():
+            with self.subTest(name):
+                plan = queryset.explain(**explain_options)
+                accesses = table_accesses(plan, str(queryset.query))
+                scanned = sorted({table for table, _, full_scan in accesses if table in tables and full_scan})
+                missing = sorted(tables - {table for table, _, _ in accesses})
+                self.assertFalse(scanned, f"Full scan of {', '.join(scanned)} in:\n{plan}")
+                self.assertFalse(missing, f"{', '.join(missing)} not in the plan:\n{plan}")
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL-only schema objects (run by the CI test job)')
+class PostgresSchemaTests(TestCase):
+    """
+    The objects installed by ``postgres.py``: the double-booking exclusion
+    constraint, the search trigger and the GIN indexes used by search.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.customer = create_user('customer')
+        cls.vehicle = create_vehicle(cls.partner)
+
+    def test_objects_are_installed(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT conname FROM pg_constraint WHERE conname = ANY(%s)', [list(postgres.CONSTRAINTS)])
+            self.assertEqual({row[0] for row in cursor.fetchall()}, set(postgres.CONSTRAINTS))
+            cursor.execute('SELECT tgname FROM pg_trigger WHERE tgname = ANY(%s)', [list(postgres.TRIGGERS)])
+            self.assertEqual({row[0] for row in cursor.fetchall()}, set(postgres.TRIGGERS))
+            cursor.execute('SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)', [list(postgres.INDEXES)])
+            self.assertEqual({row[0] for row in cursor.fetchall()}, set(postgres.INDEXES))
+
+    def test_constraint_rejects_overlapping_active_bookings(self):
+        create_booking(self.customer, self.vehicle, MONDAY, days=2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=1), days=2)
+
+        # Booking yang dibatalkan dan rentang yang hanya bersentuhan boleh
+        create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=1), days=2, status='cancelled')
+        create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=2), days=1)
+
+    def test_constraint_accepts_inverted_legacy_rows(self):
+        # start_date > end_date menjadi rentang kosong, bukan error tstzrange
+        Booking.objects.create(
+            customer=self.customer, vehicle=self.vehicle, start_date=MONDAY + timedelta(days=1),
+            end_date=MONDAY, total_price=Decimal('0'), status='pending',
+        )
+        create_booking(self.customer, self.vehicle, MONDAY, days=2)
+
+    def test_search_uses_gin_indexes(self):
+        self.vehicle.refresh_from_db()
+        self.assertIsNotNone(self.vehicle.search_vector)
+        queryset = search.search_vehicles(Vehicle.objects.all(), 'toyta avanza')
+        self.assertEqual(list(queryset), [self.vehicle])
+
+        # Tabel kecil: paksa planner memilih index jika index itu bisa dipakai
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain(format='json')
+        used = set(re.findall(r'"Index Name": "(\w+)"', plan))
+        self.assertLessEqual(set(postgres.INDEXES), used, plan)
+
+class BookingStatusTests(TestCase):
+    """
+    Double-booking protection on create and on status changes, and the
+    per-item results of bulk-status.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.customer = create_user('customer')
+        cls.stranger = create_user('stranger')
+        cls.vehicle = create_vehicle(cls.partner)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def post_booking(self, start, days):
+        return self.client.post('/api/bookings/', {
+            'vehicle_id': self.vehicle.pk,
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=days)).isoformat(),
+        }, format='json')
+
+    def test_create_rejects_overlap_with_active_booking(self):
+        create_booking(self.customer, self.vehicle, MONDAY, days=2)
+
+        response = self.post_booking(MONDAY + timedelta(days=1), days=2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_create_allows_adjacent_and_cancelled_periods(self):
+        create_booking(self.customer, self.vehicle, MONDAY, days=2)
+        create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=5), days=2, status='cancelled')
+
+        # Rentang setengah terbuka: booking boleh mulai tepat saat booking lain selesai
+        self.assertEqual(self.post_booking(MONDAY + timedelta(days=2), days=1).status_code, 201)
+        self.assertEqual(self.post_booking(MONDAY + timedelta(days=5), days=2).status_code, 201)
+
+    def test_change_status_follows_allowed_transitions(self):
+        booking = create_booking(self.customer, self.vehicle)
+        url = f'/api/bookings/{booking.pk}/change_status/'
+
+        self.assertEqual(self.client.post(url, {'status': 'completed'}, format='json').status_code, 400)
+        response = self.client.post(url, {'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'confirmed')
+        self.assertTrue(BookingLog.objects.filter(booking=booking, new_status='confirmed').exists())
+        self.assertEqual(self.client.post(url, {'status': 'confirmed'}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'status': 'unknown'}, format='json').status_code, 400)
+
+    def test_change_status_cannot_reactivate_into_double_booking(self):
+        # Regresi: booking yang dibatalkan diaktifkan lagi di atas booking aktif
+        cancelled = create_booking(self.customer, self.vehicle, status='cancelled')
+        active = create_booking(self.stranger, self.vehicle, MONDAY + timedelta(days=1))
+
+        response = self.client.post(
+            f'/api/bookings/{cancelled.pk}/change_status/', {'status': 'pending'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        cancelled.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((cancelled.status, active.status), ('cancelled', 'pending'))
+
+    def test_bulk_status_reports_every_item(self):
+        to_confirm = create_booking(self.customer, self.vehicle)
+        unchanged = create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=3))
+        completed = create_booking(self.customer, self.vehicle, MONDAY + timedelta(days=6), status='completed')
+        foreign = create_booking(self.stranger, create_vehicle(create_user('other-partner', role='partner')))
+
+        response = self.client.post('/api/bookings/bulk-status/', {'items': [
+            {'id': to_confirm.pk, 'status': 'confirmed'},
+            {'id': unchanged.pk, 'status': 'pending'},
+            {'id': completed.pk, 'status': 'pending'},
+            {'id': foreign.pk, 'status': 'cancelled'},
+            {'id': 0, 'status': 'cancelled'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            [(item['id'], item['result']) for item in response.data['results']],
+            [
+                (to_confirm.pk, 'updated'),
+                (unchanged.pk, 'unchanged'),
+                (completed.pk, 'error'),
+                (foreign.pk, 'error'),
+                (0, 'error'),
+            ],
+        )
+        self.assertEqual(response.data['results'][3]['detail'], "Booking not found.")
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[to_confirm.pk], 'confirmed')
+        self.assertEqual(statuses[completed.pk], 'completed')
+        self.assertEqual(statuses[foreign.pk], 'pending')
+        self.assertEqual(BookingLog.objects.filter(booking=to_confirm, new_status='confirmed').count(), 1)
+
+    def test_bulk_status_partner_sees_bookings_of_own_vehicles(self):
+        booking = create_booking(self.customer, self.vehicle)
+        self.client.force_authenticate(self.partner)
+
+        response = self.client.post('/api/bookings/bulk-status/', {
+            'items': [{'id': booking.pk, 'status': 'confirmed'}],
+        }, format='json')
+        self.assertEqual(response.data['results'][0]['result'], 'updated')
+
+        self.client.force_authenticate(self.stranger)
+        response = self.client.post('/api/bookings/bulk-status/', {
+            'items': [{'id': booking.pk, 'status': 'cancelled'}],
+        }, format='json')
+        self.assertEqual(response.data['results'][0]['detail'], "Booking not found.")
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'confirmed')
+
+    def test_bulk_status_rejects_duplicate_items(self):
+        booking = create_booking(self.customer, self.vehicle)
+        response = self.client.post('/api/bookings/bulk-status/', {'items': [
+            {'id': booking.pk, 'status': 'confirmed'},
+            {'id': booking.pk, 'status': 'cancelled'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class PricingTests(TestCase):
+    """
+    Per-day pricing rules, the /quote/ endpoint and its limits, and the
+    total_price stored on create and update.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.customer = create_user('customer')
+        cls.vehicle = create_vehicle(cls.partner, daily_price='100000')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.addCleanup(self.reset_rules)
+
+    def reset_rules(self):
+        # Aturan harga di-compile sekali per proses; susun ulang setelah settings diubah
+        pricing.get_rules.cache_clear()
+        pricing.invalidate(self.vehicle.pk)
+
+    def test_every_started_day_is_charged(self):
+        self.assertEqual(pricing.quote(self.vehicle, MONDAY, MONDAY + timedelta(hours=1)), (1, Decimal('100000.00')))
+        self.assertEqual(pricing.quote(self.vehicle, MONDAY, MONDAY + timedelta(days=1)), (1, Decimal('100000.00')))
+        self.assertEqual(pricing.quote(self.vehicle, MONDAY, MONDAY + timedelta(hours=25)), (2, Decimal('200000.00')))
+
+    @override_settings(
+        PRICING_WEEKEND_MULTIPLIER='1.5',
+        PRICING_SEASONS=[{'start': (3, 7), 'end': (3, 7), 'multiplier': '2'}],
+    )
+    def test_weekend_and_season_multipliers(self):
+        self.reset_rules()
+        # Senin-Kamis x1, Jumat 7 Maret x2 (musim), Sabtu dan Minggu x1.5
+        days, total = pricing.quote(self.vehicle, MONDAY, MONDAY + timedelta(days=7))
+        self.assertEqual((days, total), (7, Decimal('900000.00')))
+
+    @override_settings(PRICING_SEASONS=[{'start': (12, 30), 'end': (1, 1), 'multiplier': '2'}])
+    def test_season_across_new_year(self):
+        self.reset_rules()
+        start = timezone.make_aware(datetime(2030, 12, 29, 10, 0))
+        # 29 Des x1, 30 Des - 1 Jan x2
+        self.assertEqual(pricing.quote(self.vehicle, start, start + timedelta(days=4)), (4, Decimal('700000.00')))
+
+    def test_price_table_follows_daily_price_changes(self):
+        pricing.quote(self.vehicle, MONDAY, MONDAY + timedelta(days=1))
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(daily_price=Decimal('150000'))
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+        self.assertEqual(pricing.quote(vehicle, MONDAY, MONDAY + timedelta(days=1)), (1, Decimal('150000.00')))
+
+    def test_quote_single_range(self):
+        response = self.client.get(f'/api/vehicles/{self.vehicle.pk}/quote/', {
+            'start_date': MONDAY.isoformat(), 'end_date': (MONDAY + timedelta(days=2)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['daily_price'], '100000.00')
+        self.assertEqual(
+            [(quote['days'], quote['total_price']) for quote in response.data['quotes']], [(2, '200000.00')]
+        )
+
+    def test_quote_many_ranges(self):
+        ranges = [
+            {'start_date': (MONDAY + timedelta(days=i)).isoformat(),
+             'end_date': (MONDAY + timedelta(days=i + days)).isoformat()}
+            for i, days in ((0, 1), (7, 3))
+        ]
+        response = self.client.post(f'/api/vehicles/{self.vehicle.pk}/quote/', {'ranges': ranges}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(quote['days'], quote['total_price']) for quote in response.data['quotes']],
+            [(1, '100000.00'), (3, '300000.00')],
+        )
+
+    def test_quote_limits(self):
+        url = f'/api/vehicles/{self.vehicle.pk}/quote/'
+        day = {'start_date': MONDAY.isoformat(), 'end_date': (MONDAY + timedelta(days=1)).isoformat()}
+        response = self.client.post(url, {'ranges': [day] * (settings.PRICING_MAX_QUOTE_RANGES + 1)}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(url, {'ranges': []}, format='json').status_code, 400)
+
+        too_long = {
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=settings.PRICING_MAX_RENTAL_DAYS + 1)).isoformat(),
+        }
+        response = self.client.get(url, too_long)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.data)
+        inverted = {'start_date': day['end_date'], 'end_date': day['start_date']}
+        self.assertEqual(self.client.get(url, inverted).status_code, 400)
+
+    @override_settings(PRICING_MAX_RENTAL_DAYS=3)
+    def test_rental_days_limit_applies_to_bookings(self):
+        response = self.client.post('/api/bookings/', {
+            'vehicle_id': self.vehicle.pk,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=4)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['end_date'], ["A rental may last at most 3 days."])
+
+    def test_create_and_update_compute_total_price(self):
+        response = self.client.post('/api/bookings/', {
+            'vehicle_id': self.vehicle.pk,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=3)).isoformat(),
+            # Read-only: harga selalu dihitung server
+            'total_price': '1.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_price'], '300000.00')
+
+        response = self.client.patch(f"/api/bookings/{response.data['id']}/", {
+            'end_date': (MONDAY + timedelta(days=2)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_price'], '200000.00')
+
+    def test_total_price_beyond_column_precision_is_rejected(self):
+        vehicle = create_vehicle(self.partner, daily_price='60000000')
+        response = self.client.post('/api/bookings/', {
+            'vehicle_id': vehicle.pk,
+            'start_date': MONDAY.isoformat(),
+            'end_date': (MONDAY + timedelta(days=2)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.filter(vehicle=vehicle).exists())
+
+
+def run_settings():
+    # Jalankan ulang settings.py dengan environment saat ini (tanpa mengganti settings aktif)
+    return runpy.run_path(os.path.join(settings.BASE_DIR, 'sewoapp_backend', 'settings.py'))
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    """
+    ETag round trips and version-stamp invalidation of the vehicle response
+    cache, and the settings guard against per-process caches.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.vehicle = create_vehicle(cls.partner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_etag_round_trip(self):
+        first = self.client.get('/api/vehicles/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertNotIn('Last-Modified', first)
+
+        second = self.client.get('/api/vehicles/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.data, first.data)
+
+        not_modified = self.client.get('/api/vehicles/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+        # Tanpa ETag, If-Modified-Since tidak pernah menghasilkan 304
+        since = self.client.get('/api/vehicles/', HTTP_IF_MODIFIED_SINCE='Tue, 01 Jan 2099 00:00:00 GMT')
+        self.assertEqual(since.status_code, 200)
+
+    def test_write_invalidates_list_and_detail(self):
+        detail_url = f'/api/vehicles/{self.vehicle.pk}/'
+        list_etag = self.client.get('/api/vehicles/')['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        # Versi dinaikkan setelah commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.partner)
+            response = self.client.patch(detail_url, {'daily_price': '125000.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        listing = self.client.get('/api/vehicles/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(listing.status_code, 200)
+        self.assertEqual(listing['X-Cache'], 'MISS')
+        self.assertEqual(listing.data['results'][0]['daily_price'], '125000.00')
+        detail = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data['daily_price'], '125000.00')
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled_cache_renders_every_request(self):
+        response = self.client.get('/api/vehicles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Cache', response)
+        self.assertNotIn('ETag', response)
+
+    def test_settings_require_shared_cache(self):
+        for cache_url in ('locmemcache://', 'dummycache://'):
+            environ = {'CACHE_URL': cache_url, 'RESPONSE_CACHE_ENABLED': 'true'}
+            with self.subTest(cache_url), mock.patch.dict(os.environ, environ):
+                with self.assertRaises(ImproperlyConfigured):
+                    run_settings()
+
+        with mock.patch.dict(os.environ, {'CACHE_URL': 'redis://cache:6379/1'}):
+            os.environ.pop('RESPONSE_CACHE_ENABLED', None)
+            namespace = run_settings()
+        self.assertTrue(namespace['RESPONSE_CACHE_ENABLED'])
+
+
+class ChatViewTests(TestCase):
+    """
+    The async MessageListView and MarkMessagesAsReadView: authentication,
+    participant checks, CSRF, cursor and delta-sync parameters, and the
+    unread counters.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.customer = create_user('customer')
+        cls.stranger = create_user('stranger')
+        booking = create_booking(cls.customer, create_vehicle(cls.partner))
+        cls.conversation = Conversation.objects.create(booking=booking)
+        cls.messages_url = f'/api/conversations/{cls.conversation.pk}/messages/'
+        cls.read_url = f'/api/conversations/{cls.conversation.pk}/mark-read/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def send(self, user, content):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(self.messages_url, {'content': content}, format='json')
+
+    def unread_count(self, user):
+        counter = UnreadCounter.objects.filter(user=user, conversation=self.conversation).first()
+        return counter.count if counter is not None else 0
+
+    def test_requires_authentication(self):
+        client = APIClient()
+        for method, url in (('get', self.messages_url), ('post', self.messages_url), ('put', self.read_url)):
+            with self.subTest(method=method, url=url):
+                response = getattr(client, method)(url)
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(response.json()['detail'], "Authentication credentials were not provided.")
+
+    def test_only_participants(self):
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(self.messages_url).status_code, 403)
+        self.assertEqual(self.client.post(self.messages_url, {'content': 'halo'}, format='json').status_code, 403)
+        self.assertEqual(self.client.put(self.read_url).status_code, 403)
+        self.assertEqual(self.client.get('/api/conversations/0/messages/').status_code, 404)
+
+    def test_send_message(self):
+        response = self.send(self.customer, 'halo')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['content'], 'halo')
+        self.assertEqual(self.unread_count(self.partner), 1)
+        self.assertEqual(self.unread_count(self.customer), 0)
+        self.assertEqual(self.send(self.customer, '').status_code, 400)
+
+    def test_session_requests_need_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.customer)
+
+        response = client.post(self.messages_url, {'content': 'halo'}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF Failed', response.json()['detail'])
+        self.assertEqual(client.put(self.read_url).status_code, 403)
+        self.assertFalse(Message.objects.exists())
+
+        # Secret di cookie dan header yang sama
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        response = client.post(
+            self.messages_url, {'content': 'halo'}, content_type='application/json', HTTP_X_CSRFTOKEN='a' * 32
+        )
+        self.assertEqual(response.status_code, 201)
+        # GET tidak butuh token
+        self.assertEqual(Client(enforce_csrf_checks=True).get(self.messages_url).status_code, 403)
+        self.assertEqual(client.get(self.messages_url).status_code, 200)
+
+    def test_cursor_pagination(self):
+        for i in range(5):
+            self.send(self.partner, f'pesan {i}')
+
+        first = self.client.get(self.messages_url, {'page_size': 2}).json()
+        self.assertEqual([message['content'] for message in first['results']], ['pesan 0', 'pesan 1'])
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).json()
+        self.assertEqual([message['content'] for message in second['results']], ['pesan 2', 'pesan 3'])
+        back = self.client.get(second['previous']).json()
+        self.assertEqual([message['content'] for message in back['results']], ['pesan 0', 'pesan 1'])
+
+        for cursor in ('not-base64!', 'bm9wZQ=='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.messages_url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()['detail'], 'Invalid cursor')
+
+    def test_delta_sync_parameters(self):
+        ids = [self.send(self.partner, f'pesan {i}').json()['id'] for i in range(3)]
+
+        response = self.client.get(self.messages_url, {'after_id': ids[0]}).json()
+        self.assertEqual([message['id'] for message in response['results']], ids[1:])
+        self.assertEqual(response['last_id'], ids[-1])
+        self.assertFalse(response['has_more'])
+
+        response = self.client.get(self.messages_url, {'after_id': 0, 'page_size': 2}).json()
+        self.assertEqual((response['last_id'], response['has_more']), (ids[1], True))
+
+        for params, detail in (
+            ({'after_id': 'abc'}, 'after_id must be an integer'),
+            ({'after_id': '-1'}, 'after_id must not be negative'),
+            ({'since': 'yesterday'}, 'since must be an ISO 8601 timestamp'),
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.messages_url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['detail'], detail)
+
+    def test_mark_read_resets_unread_counter(self):
+        for i in range(3):
+            self.send(self.partner, f'pesan {i}')
+        self.send(self.customer, 'balasan')
+        self.assertEqual(self.unread_count(self.customer), 3)
+
+        response = self.client.put(self.read_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'success', 'messages_updated': 3})
+        self.assertEqual(self.unread_count(self.customer), 0)
+        # Pesan customer sendiri tetap belum dibaca partner
+        self.assertEqual(self.unread_count(self.partner), 1)
+        self.assertEqual(Message.objects.filter(is_read=False).count(), 1)
+        self.assertEqual(self.client.patch(self.read_url).json()['messages_updated'], 0)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER, CHAT_WRITE_BEHIND=True)
+class ChatWriteBehindTests(TestCase):
+    """
+    Live ``message`` frames sent before the message is saved carry a
+    ``client_id`` that sync returns with the saved message.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = create_user('partner', role='partner')
+        cls.customer = create_user('customer')
+        booking = create_booking(cls.customer, create_vehicle(cls.partner))
+        cls.conversation = Conversation.objects.create(booking=booking)
+
+    def setUp(self):
+        cache.clear()
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(
+            with_user(URLRouter(websocket_urlpatterns), user), f'/ws/chat/{self.conversation.pk}/'
+        )
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_sync_returns_client_id_of_live_frame(self):
+        customer, partner = await self.connect(self.customer), await self.connect(self.partner)
+        try:
+            client_id = '7b0e5a4c-3f1d-4c8e-9a61-2d4f0c9e8b17'
+            await customer.send_json_to({'message': 'halo', 'client_id': client_id})
+            await customer.send_json_to({'message': 'tanpa id'})
+            live = [await partner.receive_json_from(), await partner.receive_json_from()]
+            # Pengirim juga menerima frame yang sama
+            self.assertEqual([await customer.receive_json_from(), await customer.receive_json_from()], live)
+            self.assertEqual([frame['id'] for frame in live], [None, None])
+            self.assertEqual(live[0]['client_id'], client_id)
+            self.assertIsNotNone(live[1]['client_id'])
+            self.assertEqual(len(message_buffer), 2)
+
+            await partner.send_json_to({'type': 'sync', 'after_id': 0})
+            sync = await partner.receive_json_from()
+            saved = await sync_to_async(list)(Message.objects.order_by('id').values_list('id', 'client_id'))
+            self.assertEqual(
+                [(message['id'], message['client_id']) for message in sync['results']],
+                [(pk, str(client_id)) for pk, client_id in saved],
+            )
+            self.assertEqual([message['client_id'] for message in sync['results']], [f['client_id'] for f in live])
+
+            await customer.send_json_to({'message': 'halo', 'client_id': 'bukan-uuid'})
+            self.assertEqual(await customer.receive_json_from(), {'type': 'error', 'detail': 'client_id must be a UUID.'})
+        finally:
+            await customer.disconnect()
+            await partner.disconnect()
@@ -0,0 +1,92 @@
+"""
+Incrementally maintained unread counters (see ``UnreadCounter``).
+
+Every code path that creates messages must call ``record_messages`` and
+every path that marks them read must call ``mark_read_until``, so that unread
+badges can be served without scanning the message table.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery
+from django.db.models.functions import Coalesce
+
+from . import notifications
+from .models import Message, UnreadCounter
+from .participants import get_participants
+
+
+def get_recipients(conversation_id, sender_id):
+    participants = get_participants(conversation_id) or ()
+    return {user_id for user_id in participants if user_id != sender_id}
+
+
+def _increment(user_id, conversation_id, count):
+    updated = UnreadCounter.objects.filter(
+        user_id=user_id, conversation_id=conversation_id
+    ).update(count=F('count') + count)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            UnreadCounter.objects.create(user_id=user_id, conversation_id=conversation_id, count=count)
+    except IntegrityError:
+        # Dibuat bersamaan oleh request lain
+        UnreadCounter.objects.filter(
+            user_id=user_id, conversation_id=conversation_id
+        ).update(count=F('count') + count)
+
+
+def record_messages(conversation_id, sender_id, count=1, preview=None):
+    """
+    Count ``count`` new messages from ``sender_id`` as unread for the other
+    participants of the conversation, and notify them after commit.
+    ``preview`` is the content of the latest message.
+    """
+    recipients = get_recipients(conversation_id, sender_id)
+    for user_id in recipients:
+        _increment(user_id, conversation_id, count)
+    notifications.notify(recipients, 'message.new', {
+        'conversation': conversation_id,
+        'sender': sender_id,
+        'count': count,
+        'preview': preview[:100] if preview else preview,
+    })
+
+
+def unread_messages(conversation_id, user_id):
+    """
+    Messages of the other participants that ``user_id`` has not read yet.
+    """
+    return Message.objects.filter(conversation_id=conversation_id, is_read=False).exclude(sender_id=user_id)
+
+
+def mark_read_until(conversation_id, user_id, message_id=None):
+    """
+    Mark the messages of the other participants as read, up to and
+    including ``message_id`` (all of them when None), with one UPDATE, and
+    bring the user's counter in line. Returns the number of messages marked.
+    """
+    messages = unread_messages(conversation_id, user_id)
+    to_mark = messages if message_id is None else messages.filter(id__lte=message_id)
+    with transaction.atomic():
+        updated = to_mark.update(is_read=True)
+        # Dihitung dari pesan yang masih belum dibaca di statement yang sama,
+        # bukan di-nol-kan: pesan yang masuk bersamaan tetap terhitung
+        remaining = messages.order_by().values('conversation_id').annotate(total=Count('pk')).values('total')
+        UnreadCounter.objects.filter(
+            user_id=user_id, conversation_id=conversation_id
+        ).update(count=Coalesce(Subquery(remaining), 0))
+    return updated
+
+
+def unread_counts(user_id):
+    """
+    ``(conversation_id, count)`` rows of the conversations with unread messages.
+    """
+    return UnreadCounter.objects.filter(user_id=user_id, count__gt=0).values_list('conversation_id', 'count')
+
+
+def unread_for_user(user_id):
+    """
+    Return ``{conversation_id: count}`` for conversations with unread messages.
+    """
+    return dict(unread_counts(user_id))
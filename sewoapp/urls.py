@@ -7,11 +7,13 @@ from .views import (
     PaymentViewSet,
     ReviewViewSet,
     QRCodeViewSet,
+    QRCodeImageView,
     ConversationListView,
     ConversationDetailView,
     MessageListView,
     MessageDetailView,
     MarkMessagesAsReadView,
+    UnreadCountView,
     StartConversationView
 )
 
@@ -30,7 +32,9 @@ router.register(r'qrcodes', QRCodeViewSet, basename='qrcode')
 urlpatterns = [
     # API routes
     path('', include(router.urls)),
+    path('qrcodes/<int:pk>/image.png', QRCodeImageView.as_view(), name='qrcode-image'),
     path('conversations/', ConversationListView.as_view(), name='conversation-list'),
+    path('conversations/unread/', UnreadCountView.as_view(), name='conversation-unread'),
     path('conversations/<int:pk>/', ConversationDetailView.as_view(), name='conversation-detail'),
     path('conversations/<int:conversation_id>/messages/', MessageListView.as_view(), name='message-list'),
     path('messages/<int:pk>/', MessageDetailView.as_view(), name='message-detail'),
@@ -1,18 +1,25 @@
-from io import BytesIO
-import base64
+from decimal import Decimal
 
-import qrcode
-from django.core.files.base import ContentFile
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags, quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from . import caching, geo, message_sync, pricing, search, unread
+from .async_api import APIError, AsyncAPIView, KeysetPaginator, json_response, parse_body
+from .audit import transition_bookings
+from .availability import filter_vehicles, overlapping_bookings
 from .models import (
     Booking,
     Conversation,
@@ -23,69 +30,215 @@ from .models import (
     User,
     Vehicle,
 )
+from .pagination import SearchPagination
+from .participants import aget_participants, get_participants_for_request, is_participant
+from .qr import create_qr_code
+from .query_plan import QueryPlanMixin, plan_queryset
 from .serializers import (
+    BookingBulkStatusSerializer,
     BookingSerializer,
+    DateRangeSerializer,
     ConversationSerializer,
+    ConversationSummarySerializer,
     MessageSerializer,
+    NearbyVehicleSerializer,
     PaymentSerializer,
     QRCodeSerializer,
     ReviewSerializer,
     UserSerializer,
+    VehicleNearbySerializer,
+    VehicleQuoteSerializer,
+    VehicleSearchSerializer,
     VehicleSerializer,
+    VehicleTextSearchSerializer,
 )
 
 # UserViewSet
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cursor_ordering = ('-date_joined', '-id')
 
 # VehicleViewSet
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(caching.CachedResponseMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
+    # Cache list/retrieve, diinvalidasi lewat signals Vehicle/Review
+    cache_namespace = 'vehicles'
+    cache_timeout = settings.VEHICLE_CACHE_TIMEOUT
 
     def perform_create(self, serializer):
         # Simulate a related booking creation or handling QR code generation
         vehicle = serializer.save()
 
-        # Generate QR Code for vehicle (or booking-related task)
+        # QR code dirender di background worker, bukan di dalam request
         qr_data = f"Vehicle ID: {vehicle.id}, Brand: {vehicle.brand}, Model: {vehicle.model}"
-        img = qrcode.make(qr_data)
-        buffer = BytesIO()
-        img.save(buffer)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        qr_url = f"data:image/png;base64,{img_base64}"
-        
-        QRCode.objects.create(
-            booking=None,  # If related to booking, make sure to connect it.
-            qr_code_data=qr_data,
-            qr_code_image_url=qr_url
+        create_qr_code(qr_data)
+
+    def get_filtered_queryset(self, params_class):
+        """
+        Validate the query params with ``params_class`` and return
+        ``(vehicles matching their filters, validated params)``.
+        """
+        params = params_class(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return filter_vehicles(self.get_queryset(), params.validated_data), params.validated_data
+
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        # Cari kendaraan yang bebas pada rentang tanggal tertentu (+ filter lain)
+        queryset, _ = self.get_filtered_queryset(VehicleSearchSerializer)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], pagination_class=SearchPagination)
+    def search(self, request):
+        """
+        Ranked text search over brand, model, location and description
+        (``?q=``), combined with the filters of ``available``.
+        """
+        params = VehicleTextSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        def render():
+            queryset = filter_vehicles(self.get_queryset(), params.validated_data)
+            page = self.paginate_queryset(search.search_vehicles(queryset, params.validated_data['q']))
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        if params.validated_data.get('start_date'):
+            # Ketersediaan bergantung pada booking, yang tidak menginvalidasi cache ini
+            return render()
+        return self.cached_response(request, None, render)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Vehicles nearest to ``?latitude=&longitude=``, within ``radius_km``
+        when given, combined with the filters of ``available``.
+        """
+        queryset, data = self.get_filtered_queryset(VehicleNearbySerializer)
+        vehicles, radius_km = geo.nearby(
+            queryset, data['latitude'], data['longitude'], data['limit'],
+            radius_km=data.get('radius_km'), max_radius_km=settings.NEARBY_MAX_RADIUS_KM,
         )
+        return Response({
+            'count': len(vehicles),
+            'radius_km': radius_km,
+            'results': NearbyVehicleSerializer(vehicles, many=True, context=self.get_serializer_context()).data,
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def quote(self, request, pk=None):
+        """
+        Price one date range (GET ?start_date=&end_date=) or many at once
+        (POST {"ranges": [...]}) for this vehicle.
+        """
+        if request.method == 'GET':
+            params = DateRangeSerializer(data=request.query_params)
+            params.is_valid(raise_exception=True)
+            ranges = [params.validated_data]
+        else:
+            params = VehicleQuoteSerializer(data=request.data)
+            params.is_valid(raise_exception=True)
+            ranges = params.validated_data['ranges']
+
+        vehicle = get_object_or_404(Vehicle.objects.only('id', 'daily_price'), pk=pk)
+        quotes = pricing.quote_many(vehicle, [(r['start_date'], r['end_date']) for r in ranges])
+        return Response({
+            'vehicle': vehicle.pk,
+            'daily_price': str(vehicle.daily_price),
+            'quotes': [
+                {'start_date': start, 'end_date': end, 'days': days, 'total_price': str(total)}
+                for start, end, days, total in quotes
+            ],
+        })
 
 # BookingViewSet
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_clashes(self, vehicle, start_date, end_date):
+        # Booking aktif lain dari kendaraan yang sama pada rentang tersebut
+        return overlapping_bookings(start_date, end_date, Booking.objects.filter(vehicle=vehicle))
+
+    def reactivation_clashes(self, booking, new_status):
+        """
+        Whether moving ``booking`` from an inactive status to the active
+        ``new_status`` would overlap another active booking of its vehicle.
+        Locks the vehicle like ``save_without_overlap``; call it inside a
+        transaction.
+        """
+        if booking.status in Booking.ACTIVE_STATUSES or new_status not in Booking.ACTIVE_STATUSES:
+            return False
+        Vehicle.objects.select_for_update().only('id').get(pk=booking.vehicle_id)
+        clashes = self.get_clashes(booking.vehicle_id, booking.start_date, booking.end_date)
+        return clashes.exclude(pk=booking.pk).exists()
+
+    def save_without_overlap(self, serializer, **kwargs):
+        """
+        Save the booking while holding a lock on its vehicle, refusing
+        date ranges that overlap another active booking of that vehicle.
+        """
+        instance = serializer.instance
+        data = serializer.validated_data
+        vehicle = data.get('vehicle', getattr(instance, 'vehicle', None))
+        start_date = data.get('start_date', getattr(instance, 'start_date', None))
+        end_date = data.get('end_date', getattr(instance, 'end_date', None))
+
+        with transaction.atomic():
+            if instance is None or instance.status in Booking.ACTIVE_STATUSES:
+                Vehicle.objects.select_for_update().only('id').get(pk=vehicle.pk)
+                clashes = self.get_clashes(vehicle, start_date, end_date)
+                if instance is not None:
+                    clashes = clashes.exclude(pk=instance.pk)
+                if clashes.exists():
+                    raise ValidationError({'detail': "Kendaraan sudah dipesan pada rentang tanggal tersebut."})
+
+            try:
+                with transaction.atomic():
+                    return serializer.save(**kwargs)
+            except IntegrityError as exc:
+                # Exclusion constraint booking_no_overlap (PostgreSQL)
+                if 'booking_no_overlap' in str(exc):
+                    raise ValidationError({'detail': "Kendaraan sudah dipesan pada rentang tanggal tersebut."})
+                raise
+
+    def compute_total_price(self, vehicle, start_date, end_date):
+        total = pricing.compute_total_price(vehicle, start_date, end_date)
+        # Dicek sebelum INSERT/UPDATE: total di luar presisi kolom bukan error 500
+        field = Booking._meta.get_field('total_price')
+        if total >= Decimal(10) ** (field.max_digits - field.decimal_places):
+            raise ValidationError({'detail': "Total harga melebihi batas maksimum."})
+        return total
+
     def perform_create(self, serializer):
         # Handle _changed_by and custom actions before booking creation
-        booking = serializer.save(customer=self.request.user)
+        data = serializer.validated_data
+        booking = self.save_without_overlap(
+            serializer,
+            customer=self.request.user,
+            total_price=self.compute_total_price(data['vehicle'], data['start_date'], data['end_date']),
+        )
 
-        # Create QR Code after booking is created
+        # Create QR Code after booking is created (rendered asynchronously)
         qr_data = f"Booking ID: {booking.id}, Customer: {booking.customer.username}"
-        img = qrcode.make(qr_data)
-        buffer = BytesIO()
-        img.save(buffer)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        qr_url = f"data:image/png;base64,{img_base64}"
-
-        # Create a QRCode instance after booking
-        QRCode.objects.create(
-            booking=booking,
-            qr_code_data=qr_data,
-            qr_code_image_url=qr_url
-        )
+        create_qr_code(qr_data, booking=booking)
+
+    def perform_update(self, serializer):
+        instance, data = serializer.instance, serializer.validated_data
+        kwargs = {}
+        # Harga dihitung ulang bila kendaraan atau tanggal berubah
+        if {'vehicle', 'start_date', 'end_date'} & data.keys():
+            kwargs['total_price'] = self.compute_total_price(
+                data.get('vehicle', instance.vehicle),
+                data.get('start_date', instance.start_date),
+                data.get('end_date', instance.end_date),
+            )
+        self.save_without_overlap(serializer, **kwargs)
 
     @action(detail=True, methods=['post'])
     def change_status(self, request, pk=None):
@@ -96,120 +249,314 @@ class BookingViewSet(viewsets.ModelViewSet):
         if new_status not in dict(Booking.STATUS_CHOICES).keys():
             return Response({"detail": "Invalid status value."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if booking.status != new_status:
+        with transaction.atomic():
+            # Status dibaca ulang di bawah lock, seperti bulk-status
+            booking = Booking.objects.select_for_update(of=('self',)).select_related('customer').get(pk=booking.pk)
+            if booking.status == new_status:
+                return Response({"detail": "No status change."}, status=status.HTTP_400_BAD_REQUEST)
+            if new_status not in Booking.ALLOWED_TRANSITIONS.get(booking.status, ()):
+                return Response(
+                    {"detail": f"Cannot change status from {booking.status} to {new_status}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if self.reactivation_clashes(booking, new_status):
+                raise ValidationError({'detail': "Kendaraan sudah dipesan pada rentang tanggal tersebut."})
+
             booking.status = new_status
             booking._changed_by = request.user  # Set who changed the status
-            booking.save()  # Save the status change
+            try:
+                with transaction.atomic():
+                    booking.save()  # Save the status change
+            except IntegrityError as exc:
+                # Exclusion constraint booking_no_overlap (PostgreSQL)
+                if 'booking_no_overlap' in str(exc):
+                    raise ValidationError({'detail': "Kendaraan sudah dipesan pada rentang tanggal tersebut."})
+                raise
 
-            # Trigger the signal for creating the log entry automatically
-            return Response(self.get_serializer(booking).data, status=status.HTTP_200_OK)
-        else:
-            return Response({"detail": "No status change."}, status=status.HTTP_400_BAD_REQUEST)
+        # Trigger the signal for creating the log entry automatically
+        return Response(self.get_serializer(booking).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Change the status of many bookings at once. Valid items are applied
+        with one UPDATE per target status and logged with ``bulk_create``;
+        every item gets its own result.
+        """
+        serializer = BookingBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+        description = serializer.validated_data.get('description') or None
+
+        # Hanya booking milik customer atau pemilik kendaraannya
+        bookings = Booking.objects.filter(pk__in=[item['id'] for item in items])
+        if not request.user.is_staff:
+            bookings = bookings.filter(Q(customer=request.user) | Q(vehicle__owner=request.user))
+
+        results = []
+        targets = {}
+        # Booking yang diaktifkan kembali di request ini, belum tersimpan di database
+        reactivated = []
+        with transaction.atomic():
+            current = bookings.select_for_update(of=('self',)).only(
+                'pk', 'status', 'vehicle_id', 'start_date', 'end_date'
+            ).in_bulk()
+            for item in items:
+                pk, new_status = item['id'], item['status']
+                booking = current.get(pk)
+                previous_status = booking.status if booking is not None else None
+                result = {'id': pk, 'previous_status': previous_status, 'status': new_status}
+                if booking is None:
+                    result.update(result='error', detail="Booking not found.")
+                elif previous_status == new_status:
+                    result.update(result='unchanged')
+                elif new_status not in Booking.ALLOWED_TRANSITIONS.get(previous_status, ()):
+                    result.update(
+                        result='error',
+                        detail=f"Cannot change status from {previous_status} to {new_status}.",
+                    )
+                elif self.reactivation_clashes(booking, new_status) or any(
+                    other.vehicle_id == booking.vehicle_id
+                    and other.start_date < booking.end_date and booking.start_date < other.end_date
+                    for other in reactivated
+                ):
+                    result.update(result='error', detail="Vehicle is already booked for this period.")
+                else:
+                    result.update(result='updated')
+                    targets.setdefault(new_status, []).append(pk)
+                    if previous_status not in Booking.ACTIVE_STATUSES and new_status in Booking.ACTIVE_STATUSES:
+                        reactivated.append(booking)
+                results.append(result)
+
+            for new_status, ids in targets.items():
+                transition_bookings(
+                    Booking.objects.filter(pk__in=ids), new_status,
+                    changed_by=request.user, description=description,
+                )
+
+        return Response({
+            'updated': sum(len(ids) for ids in targets.values()),
+            'results': results,
+        }, status=status.HTTP_200_OK)
 
 # PaymentViewSet
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    cursor_ordering = ('-payment_date', '-id')
 
 # ReviewViewSet
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    permission_classes = [IsAuthenticated]
+
+    def check_review_owner(self, review):
+        if review.customer_id != self.request.user.pk and not self.request.user.is_staff:
+            raise PermissionDenied("Anda hanya dapat mengubah review milik Anda")
+
+    # Review dan VehicleRating diperbarui dalam satu transaksi
+    def perform_create(self, serializer):
+        booking = serializer.validated_data['booking']
+        with transaction.atomic():
+            # Lock booking: dua request bersamaan tidak bisa sama-sama lolos cek satu review per booking
+            Booking.objects.select_for_update().only('id').get(pk=booking.pk)
+            if Review.objects.filter(booking=booking).exists():
+                raise ValidationError({'booking': ["This booking has already been reviewed."]})
+            serializer.save(customer=self.request.user, vehicle_id=booking.vehicle_id)
+
+    def perform_update(self, serializer):
+        self.check_review_owner(serializer.instance)
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        self.check_review_owner(instance)
+        with transaction.atomic():
+            instance.delete()
 
 # QRCodeViewSet
-class QRCodeViewSet(viewsets.ModelViewSet):
+class QRCodeViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = QRCode.objects.all()
     serializer_class = QRCodeSerializer
 
+class QRCodeImageView(generics.GenericAPIView):
+    """
+    Stream the rendered PNG of a QR code, with ETag/If-None-Match support.
+    """
+    queryset = QRCode.objects.only('id', 'image', 'image_hash', 'status')
+
+    def get(self, request, *args, **kwargs):
+        qr_code = self.get_object()
+        if qr_code.status != QRCode.STATUS_READY or not qr_code.image:
+            raise NotFound("QR code image is not ready yet.")
+
+        etag = quote_etag(qr_code.image_hash)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(qr_code.image.open('rb'), content_type='image/png')
+        response['ETag'] = etag
+        patch_cache_control(response, **settings.QR_IMAGE_CACHE_CONTROL)
+        return response
+
 # Conservation and Message Views
 
-class ConversationListView(generics.ListAPIView):
-    serializer_class = ConversationSerializer
+class ConversationListView(QueryPlanMixin, generics.ListAPIView):
+    queryset = Conversation.objects.all()
+    serializer_class = ConversationSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
+    cursor_ordering = ('-updated_at', '-id')
 
     def get_queryset(self):
-        # Hanya tampilkan conversation yang melibatkan user saat ini
-        return Conversation.objects.filter(
-            Q(booking__customer=self.request.user) |
-            Q(booking__vehicle__owner=self.request.user)
-        ).order_by('-updated_at')
+        # Hanya tampilkan conversation yang melibatkan user saat ini,
+        # riwayat lengkap ada di ConversationDetailView
+        return super().get_queryset().for_user(self.request.user).with_summary(self.request.user)
+
+def check_conversation_access(request, conversation_id, message=None):
+    """
+    404 if the conversation does not exist, 403 if the current user is not
+    one of its participants. Uses the cached participant lookup.
+    """
+    participants = get_participants_for_request(request, conversation_id)
+    if participants is None:
+        raise Http404
+    if not is_participant(participants, request.user):
+        raise PermissionDenied(message)
 
-class ConversationDetailView(generics.RetrieveAPIView):
+async def acheck_conversation_access(user, conversation_id, message=None):
+    """
+    Async variant of ``check_conversation_access`` for ``AsyncAPIView``.
+    """
+    participants = await aget_participants(conversation_id)
+    if participants is None:
+        raise APIError("Not found.", status=status.HTTP_404_NOT_FOUND)
+    if not is_participant(participants, user):
+        raise APIError(
+            message or "You do not have permission to perform this action.",
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+class ConversationDetailView(QueryPlanMixin, generics.RetrieveAPIView):
+    queryset = Conversation.objects.all()
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        conversation = get_object_or_404(Conversation, id=self.kwargs['pk'])
-        
         # Verifikasi partisipan conversation
-        if self.request.user not in [conversation.booking.customer, conversation.booking.vehicle.owner]:
-            raise PermissionDenied("Anda tidak memiliki akses ke percakapan ini")
-            
-        return conversation
+        check_conversation_access(
+            self.request, self.kwargs['pk'], "Anda tidak memiliki akses ke percakapan ini"
+        )
+        return get_object_or_404(self.get_queryset(), id=self.kwargs['pk'])
 
-class MessageListView(generics.ListCreateAPIView):
-    serializer_class = MessageSerializer
-    permission_classes = [permissions.IsAuthenticated]
+class MessageListView(AsyncAPIView):
+    """
+    Messages of a conversation, oldest first (GET), and sending a message
+    (POST). Async so that a single worker can serve many chat clients.
 
-    def get_queryset(self):
-        conversation = get_object_or_404(Conversation, id=self.kwargs['conversation_id'])
-        
-        # Verifikasi partisipan conversation
-        if self.request.user not in [conversation.booking.customer, conversation.booking.vehicle.owner]:
-            raise PermissionDenied()
-            
-        return Message.objects.filter(conversation=conversation).order_by('timestamp')
+    With ``?after_id=`` and/or ``?since=`` only newer messages are returned,
+    in the compact delta-sync format of ``message_sync.py``.
+    """
 
-    def perform_create(self, serializer):
-        conversation = get_object_or_404(Conversation, id=self.kwargs['conversation_id'])
-        
+    async def get(self, request, conversation_id):
         # Verifikasi partisipan conversation
-        if self.request.user not in [conversation.booking.customer, conversation.booking.vehicle.owner]:
-            raise PermissionDenied()
-            
-        serializer.save(sender=self.request.user, conversation=conversation)
+        await acheck_conversation_access(request.user, conversation_id)
+
+        if 'after_id' in request.GET or 'since' in request.GET:
+            return await self.sync(request, conversation_id)
+
+        paginator = KeysetPaginator(request)
+        messages, next_url, previous_url = await paginator.paginate(self.get_queryset(conversation_id))
+        return json_response({
+            'next': next_url,
+            'previous': previous_url,
+            'results': MessageSerializer(messages, many=True).data,
+        })
+
+    def get_queryset(self, conversation_id):
+        return plan_queryset(Message.objects.filter(conversation_id=conversation_id), MessageSerializer)
 
-class MessageDetailView(generics.RetrieveAPIView):
+    async def sync(self, request, conversation_id):
+        try:
+            after_id, since = message_sync.parse_sync_params(
+                request.GET.get('after_id'), request.GET.get('since')
+            )
+        except ValueError as exc:
+            raise APIError(str(exc), status=status.HTTP_400_BAD_REQUEST)
+        # page_size opsional, dibatasi CHAT_SYNC_MAX_MESSAGES
+        limit = request.GET.get('page_size', '')
+        limit = int(limit) if limit.isdigit() else None
+        return json_response(await message_sync.amessages_since(conversation_id, after_id, since, limit))
+
+    async def post(self, request, conversation_id):
+        await acheck_conversation_access(request.user, conversation_id)
+
+        serializer = MessageSerializer(data=parse_body(request))
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        message = await sync_to_async(self.save_message)(serializer, request.user, conversation_id)
+        return json_response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+
+    def save_message(self, serializer, sender, conversation_id):
+        # Pesan dan unread counter dalam satu transaksi (belum bisa di async ORM)
+        with transaction.atomic():
+            message = serializer.save(sender=sender, conversation_id=conversation_id)
+            unread.record_messages(conversation_id, sender.pk, preview=message.content)
+        return message
+
+class MessageDetailView(QueryPlanMixin, generics.RetrieveAPIView):
+    queryset = Message.objects.all()
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        message = get_object_or_404(Message, id=self.kwargs['pk'])
+        message = get_object_or_404(self.get_queryset(), id=self.kwargs['pk'])
         
         # Verifikasi partisipan conversation
-        if self.request.user not in [message.conversation.booking.customer, 
-                                   message.conversation.booking.vehicle.owner]:
-            raise PermissionDenied()
-            
+        check_conversation_access(self.request, message.conversation_id)
         return message
 
-class MarkMessagesAsReadView(generics.UpdateAPIView):
-    permission_classes = [permissions.IsAuthenticated]
-
-    def update(self, request, *args, **kwargs):
-        conversation = get_object_or_404(Conversation, id=kwargs['conversation_id'])
-        
+class MarkMessagesAsReadView(AsyncAPIView):
+    async def put(self, request, conversation_id):
         # Verifikasi partisipan conversation
-        if request.user not in [conversation.booking.customer, conversation.booking.vehicle.owner]:
-            raise PermissionDenied()
-        
-        # Tandai pesan yang belum dibaca sebagai sudah dibaca
-        updated = Message.objects.filter(
-            conversation=conversation,
-            is_read=False
-        ).exclude(sender=request.user).update(is_read=True)
-        
-        return Response({
+        await acheck_conversation_access(request.user, conversation_id)
+
+        # Tandai pesan yang belum dibaca sebagai sudah dibaca, counter ikut disesuaikan
+        updated = await sync_to_async(unread.mark_read_until)(conversation_id, request.user.pk)
+
+        return json_response({
             'status': 'success',
             'messages_updated': updated
         }, status=status.HTTP_200_OK)
 
+    patch = put
+
+class UnreadCountView(generics.GenericAPIView):
+    """
+    Unread badges for the current user, read from the counter table only
+    so that polling clients never touch the message table.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        counts = unread.unread_for_user(request.user.pk)
+        return Response({
+            'total': sum(counts.values()),
+            'conversations': [
+                {'conversation': conversation_id, 'count': count}
+                for conversation_id, count in counts.items()
+            ],
+        })
+
 class StartConversationView(generics.CreateAPIView):
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
-        booking = get_object_or_404(Booking, id=request.data.get('booking_id'))
+        booking = get_object_or_404(
+            Booking.objects.select_related('customer', 'vehicle__owner'),
+            id=request.data.get('booking_id'),
+        )
         
         # Verifikasi bahwa user adalah partisipan booking
         if request.user not in [booking.customer, booking.vehicle.owner]:
@@ -2,6 +2,8 @@
 ASGI config for sewoapp_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django, websocket connections to the Channels consumers
+in ``sewoapp/routing.py``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,24 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sewoapp_backend.settings')
 
-application = get_asgi_application()
+# Inisialisasi Django dulu sebelum meng-import consumer (yang memakai model)
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+import sewoapp.routing  # noqa: E402
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    # Autentikasi lewat cookie session: tolak Origin di luar ALLOWED_HOSTS
+    # agar situs lain tidak bisa membuka socket atas nama user
+    "websocket": AllowedHostsOriginValidator(
+        AuthMiddlewareStack(
+            URLRouter(
+                sewoapp.routing.websocket_urlpatterns
+            )
+        )
+    ),
+})
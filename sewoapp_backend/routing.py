@@ -1,11 +0,0 @@
-from channels.auth import AuthMiddlewareStack
-from channels.routing import ProtocolTypeRouter, URLRouter
-import sewoapp.routing
-
-application = ProtocolTypeRouter({
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            sewoapp.routing.websocket_urlpatterns
-        )
-    ),
-})
\ No newline at end of file
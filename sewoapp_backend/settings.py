@@ -1,5 +1,8 @@
 import environ
+import importlib.util
 import os
+import django
+from django.core.exceptions import ImproperlyConfigured
 from pathlib import Path
 
 env = environ.Env()
@@ -30,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'sewoapp',
     'drf_yasg',
@@ -37,6 +41,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Paling luar agar middleware lain ikut terukur; nonaktif tanpa biaya
+    # kecuali INSTRUMENTATION_ENABLED (lihat sewoapp/instrumentation.py)
+    'sewoapp.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +83,25 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Chat write-behind: broadcast first, persist messages in batches (see sewoapp/chat_buffer.py)
+CHAT_WRITE_BEHIND = env.bool('CHAT_WRITE_BEHIND', default=False)
+CHAT_BUFFER_MAX_SIZE = env.int('CHAT_BUFFER_MAX_SIZE', default=100)
+CHAT_BUFFER_FLUSH_INTERVAL = env.float('CHAT_BUFFER_FLUSH_INTERVAL', default=0.5)
+# Flushes a message may fail (e.g. its conversation was deleted) before it is dropped
+CHAT_BUFFER_MAX_RETRIES = env.int('CHAT_BUFFER_MAX_RETRIES', default=3)
+
+# Ephemeral chat events (see sewoapp/presence.py), never written to the database
+# Typing events are forwarded at most once per interval per connection
+CHAT_TYPING_INTERVAL = env.float('CHAT_TYPING_INTERVAL', default=2.0)
+# Read receipts are collected for this long and applied as one UPDATE
+CHAT_READ_RECEIPT_DELAY = env.float('CHAT_READ_RECEIPT_DELAY', default=1.0)
+# Presence expires unless the client sends a heartbeat within this many seconds
+# (enabled with CHAT_PRESENCE_ENABLED, below the cache settings)
+CHAT_PRESENCE_TTL = env.int('CHAT_PRESENCE_TTL', default=60)
+
+# Maximum number of messages per delta sync response (see sewoapp/message_sync.py)
+CHAT_SYNC_MAX_MESSAGES = env.int('CHAT_SYNC_MAX_MESSAGES', default=500)
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -90,6 +116,89 @@ DATABASES = {
     }
 }
 
+# Connection reuse, chosen per process with DATABASE_POOL:
+#   'persistent' - keep each worker thread's connection open for DATABASE_CONN_MAX_AGE
+#                  seconds, checked before reuse (WSGI workers, Channels workers)
+#   'native'     - psycopg 3 connection pool inside the process (Django 5.1+, needs
+#                  psycopg[pool]); use this for the ASGI app, where request threads
+#                  are short-lived and cannot keep persistent connections
+#   'pooler'     - connect through a local transaction-mode pooler such as PgBouncer
+#   'off'        - open a new connection for every request
+DATABASE_POOL = env('DATABASE_POOL', default='persistent')
+
+if DATABASE_POOL == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DATABASE_CONN_MAX_AGE', default=60)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DATABASE_POOL == 'native':
+    # requirements.txt hanya memasang psycopg2; mode ini butuh paket tambahan
+    missing = [
+        requirement for requirement, available in [
+            ('Django>=5.1', django.VERSION >= (5, 1)),
+            ('psycopg>=3', importlib.util.find_spec('psycopg') is not None),
+            ('psycopg-pool', importlib.util.find_spec('psycopg_pool') is not None),
+        ] if not available
+    ]
+    if missing:
+        raise ImproperlyConfigured(
+            f"DATABASE_POOL='native' requires {', '.join(missing)} "
+            "(pip install 'Django>=5.1' 'psycopg[binary,pool]'), or choose another DATABASE_POOL mode."
+        )
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=2),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            'timeout': env.int('DATABASE_POOL_TIMEOUT', default=10),
+        },
+    }
+elif DATABASE_POOL == 'pooler':
+    DATABASES['default']['HOST'] = env('DATABASE_POOLER_HOST', default='127.0.0.1')
+    DATABASES['default']['PORT'] = env('DATABASE_POOLER_PORT', default='6432')
+    # Transaction pooling tidak mendukung server-side cursor (.iterator())
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DATABASE_POOL != 'off':
+    raise ImproperlyConfigured(f"Unknown DATABASE_POOL mode: {DATABASE_POOL!r}")
+
+# Cache
+# Local memory by default (tests/dev); set CACHE_URL=redis://host:6379/1 in production
+# so all workers share participant, QR and response caches.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Local memory and dummy caches are per process: an entry written or deleted by
+# one worker is not seen by the others. Caches that must agree across workers
+# are on by default only with a shared CACHE_URL and refuse to start without one.
+_SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(('LocMemCache', 'DummyCache'))
+
+# Cache for conversation participants (see sewoapp/participants.py); 0 disables it.
+# Signals invalidate it on changes, which other workers only see in a shared cache.
+PARTICIPANT_CACHE_TIMEOUT = env.int('PARTICIPANT_CACHE_TIMEOUT', default=60 * 5 if _SHARED_CACHE else 0)
+if PARTICIPANT_CACHE_TIMEOUT and not _SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "PARTICIPANT_CACHE_TIMEOUT needs a cache shared by all workers; set CACHE_URL "
+        "(e.g. redis://host:6379/1), otherwise other workers keep granting revoked access."
+    )
+
+# Chat presence (see sewoapp/presence.py) counts connections in the cache, so
+# users connected to other workers are only visible in a shared cache
+CHAT_PRESENCE_ENABLED = env.bool('CHAT_PRESENCE_ENABLED', default=_SHARED_CACHE)
+if CHAT_PRESENCE_ENABLED and not _SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "CHAT_PRESENCE_ENABLED needs a cache shared by all workers; set CACHE_URL "
+        "(e.g. redis://host:6379/1)."
+    )
+
+# Response cache of the vehicle catalog (sewoapp/caching.py). Its version stamps
+# must be seen by every worker, so it needs a shared CACHE_URL as well.
+RESPONSE_CACHE_ENABLED = env.bool('RESPONSE_CACHE_ENABLED', default=_SHARED_CACHE)
+if RESPONSE_CACHE_ENABLED and not _SHARED_CACHE:
+    raise ImproperlyConfigured(
+        "RESPONSE_CACHE_ENABLED needs a cache shared by all workers; set CACHE_URL "
+        "(e.g. redis://host:6379/1), otherwise other workers keep serving stale responses."
+    )
+VEHICLE_CACHE_TIMEOUT = env.int('VEHICLE_CACHE_TIMEOUT', default=60 * 10)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,6 +241,25 @@ STATIC_URL = '/static/'
 #VM Only
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Rendered QR code images; swap the backend (e.g. S3) via QR_STORAGE_BACKEND
+    'qrcodes': {
+        'BACKEND': env('QR_STORAGE_BACKEND', default='django.core.files.storage.FileSystemStorage'),
+        'OPTIONS': {
+            'location': env('QR_STORAGE_LOCATION', default=os.path.join(MEDIA_ROOT, 'qrcodes')),
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -141,8 +269,56 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'sewoapp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'sewoapp.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'sewoapp.pagination.TimestampCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
 }
+
+# QR code rendering
+# 'process' = process pool, 'thread' = background thread, 'sync' = render inside the request
+QR_RENDER_MODE = env('QR_RENDER_MODE', default='process')
+QR_RENDER_WORKERS = env.int('QR_RENDER_WORKERS', default=2)
+QR_CACHE_TIMEOUT = env.int('QR_CACHE_TIMEOUT', default=60 * 60 * 24)
+QR_IMAGE_CACHE_CONTROL = {'private': True, 'max_age': 60 * 60 * 24}
+
+# Booking pricing (sewoapp/pricing.py)
+# Multiplier for rental days falling on Saturday/Sunday
+PRICING_WEEKEND_MULTIPLIER = env('PRICING_WEEKEND_MULTIPLIER', default='1.00')
+# Seasonal multipliers, inclusive (month, day) ranges; a range may wrap the year end
+PRICING_SEASONS = [
+    # {'start': (12, 20), 'end': (1, 5), 'multiplier': '1.25'},
+]
+# Maximum number of date ranges priced in one /quote/ request
+PRICING_MAX_QUOTE_RANGES = 400
+# Longest rental (in days) that can be quoted or booked; prices are summed per day
+PRICING_MAX_RENTAL_DAYS = env.int('PRICING_MAX_RENTAL_DAYS', default=90)
+
+# Per-request instrumentation (sewoapp/instrumentation.py): Server-Timing
+# headers, N+1 warnings and Prometheus histograms at /metrics
+INSTRUMENTATION_ENABLED = env.bool('INSTRUMENTATION_ENABLED', default=False)
+# The same SQL statement executed this many times in one request is logged as N+1
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = env.int('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', default=5)
+# /metrics requires "Authorization: Bearer <token>"; it returns 404 while unset
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Vehicle search (sewoapp/search.py)
+# PostgreSQL text search configuration of the search_vector column; 'simple'
+# does no stemming, which suits brand/model names and mixed-language descriptions.
+# Existing rows keep their old vector until touched: after changing it run
+# UPDATE sewoapp_vehicle SET brand = brand
+SEARCH_CONFIG = env('SEARCH_CONFIG', default='simple')
+
+# Nearest-vehicle search (sewoapp/geo.py): largest radius searched by /api/vehicles/nearby/
+NEARBY_MAX_RADIUS_KM = env.float('NEARBY_MAX_RADIUS_KM', default=50.0)
@@ -4,6 +4,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from sewoapp.instrumentation import metrics_view
+
 # Swagger schema view
 schema_view = get_schema_view(
    openapi.Info(
@@ -22,4 +24,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('sewoapp.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
+    # Prometheus, hanya aktif dengan INSTRUMENTATION_ENABLED
+    path('metrics', metrics_view, name='metrics'),
 ]